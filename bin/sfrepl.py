@@ -4,20 +4,33 @@ import sys
 if __name__ == '__main__':
     sys.path.append(os.getcwd())
 
+import argparse
+import time
+from collections import defaultdict
+from concurrent.futures import as_completed
 from pprint import pprint
 
 from stockfighter import config
 from stockfighter.api import (
     get_orderbook,
+    order_status,
     trade_stock,
 )
+from stockfighter.async_api import AsyncClient
+from stockfighter.constants import DEFAULT_MAX_CONCURRENCY
 from stockfighter.exceptions import (
     SFBaseException,
     SyntaxError_,
 )
 
+COMMANDS = {
+    'trade': trade_stock,
+    'status': order_status,
+    'orderbook': get_orderbook,
+}
 
-def execute_statement(stmt):
+
+def parse_statement(stmt):
     idx = 0
     tokens = stmt.split(' ')
     try:
@@ -33,35 +46,151 @@ def execute_statement(stmt):
             kwargs['exchange'], kwargs['stock'] = tokens[idx].split(':')
             idx += 2
             kwargs['price'] = float(tokens[idx])
-            print 'submitting order...',
-            order = trade_stock(**kwargs)
-            print 'submitted:'
-            pprint(order.json)
+            return 'trade', kwargs
         elif tokens[idx] == 'status':
             # status <order_id> <exchange>:<stock>
-            pass
+            kwargs = {}
+            idx += 1
+            kwargs['id_'] = int(tokens[idx])
+            idx += 1
+            kwargs['exchange'], kwargs['stock'] = tokens[idx].split(':')
+            return 'status', kwargs
         elif tokens[idx] == 'orderbook':
             # orderbook <exchange>:<stock>
             idx += 1
             exchange, stock = tokens[idx].split(':')
-            order = get_orderbook(exchange=exchange, stock=stock)
-            pprint(order.json)
+            return 'orderbook', {'exchange': exchange, 'stock': stock}
         elif tokens[idx] == 'set':
             # set account <account-number>
             idx += 1
             assert tokens[idx] == 'account'
             idx += 1
-            config.init(tokens[idx])
+            return 'set', {'account': tokens[idx]}
         else:
             # TODO fill in any other operators
             raise Exception()
-    except SFBaseException:
-        raise
     except Exception:
         raise SyntaxError_(tokens, idx)
 
 
+def execute_statement(stmt):
+    command, kwargs = parse_statement(stmt)
+    if command == 'set':
+        config.init(kwargs['account'])
+        return
+
+    if command == 'trade':
+        print 'submitting order...',
+    result = COMMANDS[command](**kwargs)
+    if command == 'trade':
+        print 'submitted:'
+    pprint(result.json)
+
+
+def _timed(fn, kwargs):
+    start = time.time()
+    return fn(**kwargs), time.time() - start
+
+
+def _report(e):
+    if isinstance(e, SFBaseException):
+        print 'SF API Error:'
+        print e
+    else:
+        # a dropped connection, timeout, bad response or missing key file
+        print 'Error:'
+        print '{}: {}'.format(type(e).__name__, e)
+
+
+def _drain(pending, latencies, errors):
+    for future in as_completed(pending):
+        lineno, stmt, command = pending[future]
+        try:
+            result, latency = future.result()
+        except Exception as e:
+            # a failed statement is counted and reported, the rest still run
+            errors[command] += 1
+            print '{}: {}'.format(lineno, stmt)
+            _report(e)
+        else:
+            latencies[command].append(latency)
+            print '{}: {} ({:.1f} ms)'.format(lineno, stmt, latency * 1000)
+            pprint(result.json)
+    pending.clear()
+
+
+def run_batch(lines, concurrency=DEFAULT_MAX_CONCURRENCY):
+    '''
+    Parses every statement up front and then runs them with up to ``concurrency`` in \
+    flight, printing each result as it completes. ``set account`` waits for every earlier \
+    statement to finish before switching accounts. Returns the exit status.
+    '''
+    statements = []
+    for lineno, line in enumerate(lines, 1):
+        stmt = line.strip()
+        if not stmt or stmt.startswith('#'):
+            continue
+        try:
+            statements.append((lineno, stmt) + parse_statement(stmt))
+        except SyntaxError_ as e:
+            print 'Syntax Error on line {}:'.format(lineno)
+            print stmt
+            print e
+            return 1
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    start = time.time()
+    with AsyncClient(concurrency) as client:
+        pending = {}
+        for lineno, stmt, command, kwargs in statements:
+            if command == 'set':
+                _drain(pending, latencies, errors)
+                config.init(kwargs['account'])
+                continue
+            future = client.submit(_timed, COMMANDS[command], kwargs)
+            pending[future] = (lineno, stmt, command)
+        _drain(pending, latencies, errors)
+    elapsed = time.time() - start
+
+    print
+    print '{:<10} {:>6} {:>6} {:>9} {:>9} {:>9}'.format(
+        'command', 'ok', 'errors', 'mean ms', 'p50 ms', 'max ms',
+    )
+    for command in sorted(set(latencies) | set(errors)):
+        times = sorted(latencies[command])
+        if times:
+            mean = sum(times) / len(times) * 1000
+            stats = (mean, times[len(times) // 2] * 1000, times[-1] * 1000)
+        else:
+            stats = (float('nan'),) * 3
+        print '{:<10} {:>6} {:>6} {:>9.1f} {:>9.1f} {:>9.1f}'.format(
+            command, len(times), errors[command], *stats
+        )
+    print '{} statements in {:.2f} s ({:.1f}/s)'.format(
+        len(statements), elapsed, len(statements) / elapsed if elapsed else 0,
+    )
+    return 1 if errors else 0
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='stockfighter repl')
+    parser.add_argument(
+        '--batch', metavar='FILE',
+        help='run the statements in FILE (- for stdin) concurrently instead of interactively',
+    )
+    parser.add_argument(
+        '--concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+        help='the maximum number of statements in flight in batch mode',
+    )
+    args = parser.parse_args()
+
+    if args.batch is not None:
+        if args.batch == '-':
+            sys.exit(run_batch(sys.stdin.readlines(), args.concurrency))
+        with open(args.batch) as f:
+            sys.exit(run_batch(f.readlines(), args.concurrency))
+
     while True:
         try:
             ps1 = '{}> '.format(config.get('account'))
@@ -69,6 +198,8 @@ if __name__ == '__main__':
         except SyntaxError_ as e:
             print 'Syntax Error:'
             print e
-        except SFBaseException as e:
-            print 'SF API Error:'
-            print e
+        except EOFError:
+            print
+            break
+        except Exception as e:
+            _report(e)
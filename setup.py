@@ -2,15 +2,22 @@ from setuptools import setup
 
 
 install_requires = [
+    'futures==3.0.5',
     'requests==2.9.1',
     'schematics==1.1.1',
+    'websocket-client==0.35.0',
 ]
 
+extras_require = {
+    'analytics': ['numpy>=1.10'],
+}
+
 setup(
     name='python-stockfighter',
     version='0.0.3',
     packages=['stockfighter'],
     install_requires=install_requires,
+    extras_require=extras_require,
     include_package_data=True,
     author='github.com/akshaynanavati',
     author_email='akshay.nanavati1@gmail.com',
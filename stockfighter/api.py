@@ -1,27 +1,39 @@
-import requests
-
-import config
+from client import Client
 from constants import (
-    SF_API_BASE,
     TEST_EXCHANGE,
-    SF_AUTH_HEADER_KEY,
     MARKET_ORDER,
     TEST_STOCK,
 )
-from exceptions import (
-    HealthcheckFailed,
-    SFBaseException,
-    UnknownExchange,
-    BadRequest,
-    Unauthorized,
-)
-from validators import (
-    Stocks,
-    Orderbook,
-    Order,
-    Orders,
-    Quote,
-)
+
+# The client behind the functions in this module. It reads the account from config and sends
+# requests through the module transport (see transport.get_transport).
+_client = Client()
+
+
+def use_fast_models(enabled=True, validate=True):
+    '''
+    :param enabled: if ``True``, responses are loaded into :py:class:`records.FastRecord` \
+        objects instead of schematics models
+    :param validate: if ``False``, the records skip validation altogether
+
+    Switches every function in this module between schematics models and the lighter \
+    :py:mod:`records`, which have the same attribute names but only parse (and validate) \
+    the attributes that are read.
+    '''
+    _client.use_fast_models(enabled, validate)
+
+
+def use_clock_sync(clock_sync):
+    '''
+    :param clock_sync: a :py:class:`clocksync.ClockSync`, or ``None`` to stop annotating
+
+    :rtype: :py:class:`clocksync.ClockSync`
+    :return: ``clock_sync``
+
+    Feeds the timing of every request made through this module to ``clock_sync``, which \
+    sets the ``staleness`` and ``latency`` of the quotes, orderbooks and orders returned.
+    '''
+    return _client.use_clock_sync(clock_sync)
 
 
 def healthcheck(venue=None):
@@ -32,15 +44,7 @@ def healthcheck(venue=None):
     Raises :py:exception:`HealthcheckFailed` if the healthcheck fails i.e. the \
     stockfighter servers are down.
     '''
-    if venue is None:
-        path = '/heartbeat'
-    else:
-        path = '/venues/{}/heartbeat'
-
-    response = _make_request(path)
-    json = response.json()
-    if response.status_code != 200 or not json['ok']:
-        raise HealthcheckFailed(response.status_code, json)
+    return _client.healthcheck(venue=venue)
 
 
 def get_stocks(exchange=TEST_EXCHANGE):
@@ -53,12 +57,7 @@ def get_stocks(exchange=TEST_EXCHANGE):
 
     Gets all the stocks traded on an exchange.
     '''
-    sc, json = _make_request('/venues/{}/stocks'.format(exchange))
-
-    if sc == 404:
-        raise UnknownExchange(404)
-
-    return Stocks(json)
+    return _client.get_stocks(exchange=exchange)
 
 
 def get_orderbook(exchange=TEST_EXCHANGE, stock=TEST_STOCK):
@@ -73,10 +72,7 @@ def get_orderbook(exchange=TEST_EXCHANGE, stock=TEST_STOCK):
 
     Retrieves the orderbook for a given stock on an exchange.
     '''
-    sc, json = _make_request('/venues/{}/stocks/{}'.format(exchange, stock))
-    if sc == 404:
-        raise BadRequest(sc, json)
-    return Orderbook(json, strict=False)
+    return _client.get_orderbook(exchange=exchange, stock=stock)
 
 
 def get_quote(exchange=TEST_EXCHANGE, stock=TEST_STOCK):
@@ -91,10 +87,7 @@ def get_quote(exchange=TEST_EXCHANGE, stock=TEST_STOCK):
 
     Gets a quote of the latest known order for a given stock on an exchange.
     '''
-    sc, json = _make_request('/venues/{}/stocks/{}/quote'.format(exchange, stock))
-    if sc == 404:
-        raise BadRequest(sc, json)
-    return Quote(json)
+    return _client.get_quote(exchange=exchange, stock=stock)
 
 
 def order_status(id_, exchange=TEST_EXCHANGE, stock=TEST_STOCK):
@@ -110,10 +103,7 @@ def order_status(id_, exchange=TEST_EXCHANGE, stock=TEST_STOCK):
 
     Retrieves the order status for the specified order on the given exchange.
     '''
-    sc, json = _make_request('/venues/{}/stocks/{}/orders/{}'.format(exchange, stock, id_))
-    if sc == 401:
-        raise Unauthorized(sc, json)
-    return Order(json)
+    return _client.order_status(id_, exchange=exchange, stock=stock)
 
 
 def delete_order(id_, exchange=TEST_EXCHANGE, stock=TEST_STOCK):
@@ -129,12 +119,7 @@ def delete_order(id_, exchange=TEST_EXCHANGE, stock=TEST_STOCK):
 
     Deletes the specified order.
     '''
-    sc, json = _make_request(
-        '/venues/{}/stocks/{}/orders/{}'.format(exchange, stock, id_), type_='delete'
-    )
-    if sc == 401:
-        raise Unauthorized(sc, json)
-    return Order(json)
+    return _client.delete_order(id_, exchange=exchange, stock=stock)
 
 
 def all_orders(exchange=TEST_EXCHANGE, stock=None):
@@ -149,16 +134,7 @@ def all_orders(exchange=TEST_EXCHANGE, stock=None):
 
     Returns all orders on a given exchange. If specified, narrows down orders to the given stock.
     '''
-    if stock is None:
-        path = '/venues/{}/accounts/{}/orders'.format(exchange, config.get('account'))
-    else:
-        path = '/venues/{}/accounts/{account}/stocks/{}/orders'.format(
-            exchange,
-            config.get('account'),
-            stock,
-        )
-    _, json = _make_request(path)
-    return Orders(json)
+    return _client.all_orders(exchange=exchange, stock=stock)
 
 
 def buy_stock(quantity, **kwargs):
@@ -179,7 +155,7 @@ def buy_stock(quantity, **kwargs):
 
     Executes a buy order and returns the result.
     '''
-    return trade_stock(quantity, 'buy', **kwargs)
+    return _client.buy_stock(quantity, **kwargs)
 
 
 def sell_stock(quantity, **kwargs):
@@ -200,7 +176,7 @@ def sell_stock(quantity, **kwargs):
 
     Executes a sell order and returns the result.
     '''
-    return trade_stock(quantity, 'sell', **kwargs)
+    return _client.sell_stock(quantity, **kwargs)
 
 
 def trade_stock(
@@ -229,58 +205,46 @@ def trade_stock(
 
     Executes a buy or sell order and returns the result.
     '''
-    if price is None:
-        order_type = MARKET_ORDER
-        price = 0
-    else:
-        price = int(price * 100)
-
-    sc, json = _make_request(
-        path='/venues/{}/stocks/{}/orders'.format(exchange, stock),
-        type_='post',
-        data={
-            'account': config.get('account'),
-            'venue': exchange,
-            'stock': stock,
-            'price': price,
-            'qty': quantity,
-            'direction': direction,
-            'orderType': order_type,
-        },
+    return _client.trade_stock(
+        quantity,
+        direction,
+        exchange=exchange,
+        stock=stock,
+        price=price,
+        order_type=order_type,
     )
 
-    if sc != 200:
-        raise BadRequest(sc, json)
 
-    return Order(json, strict=False)
+def order_template(exchange=TEST_EXCHANGE, stock=TEST_STOCK, order_type=MARKET_ORDER):
+    '''
+    :param exchange: a string with the exchange name (case sesitive). \
+        Defaults to :py:data:`TEST_EXCHANGE`.
+    :param stock: a string with the stock name (case sensitive). \
+        Defaults to :py:data:`TEST_STOCK`.
+    :param order_type: The type of order. Defaults to :py:data:`MARKET_ORDER`
+
+    :rtype: :py:class:`codec.OrderTemplate`
+    :return: the pre-encoded order :py:func:`trade_stock` sends for the configured account
+
+    Templates are created on first use and reused by every later order with the same \
+    account, exchange, stock and order type.
+    '''
+    return _client.order_template(exchange=exchange, stock=stock, order_type=order_type)
 
 
-def _make_request(path, type_='get', data=None, headers=None):
+def _make_request(path, type_='get', data=None, headers=None, body=None):
     '''
     :param path: The path to the stockfighter API
     :param type_: HTTP request type in lowercase i.e. ``'get'``, ``'post'``, ``'delete'`` etc.
     :param data: a python dict which will be serialized and sent as json
     :param headers: headers to send along with the request
+    :param body: an already encoded json body, sent instead of ``data``
 
     :rtype: (integer, dictionary)
     :return: a tuple of status code and deserialized json response as a python dict
 
-    Makes the specified request to the stockfighter api. If ``'ok'`` is not ``True`` in the \
-    response, this will raise :py:exception:`SFBaseException`.
+    Makes the specified request to the stockfighter api through the pooled \
+    :py:class:`transport.Transport`. If ``'ok'`` is not ``True`` in the response, this will \
+    raise :py:exception:`SFBaseException`.
     '''
-    if headers is None:
-        headers = {}
-
-    response = getattr(requests, type_)(
-        '{}{}'.format(SF_API_BASE, path),
-        headers=dict({
-            SF_AUTH_HEADER_KEY: config.get('api_key'),
-        }, **headers),
-        json=data,
-    )
-
-    sc = response.status_code
-    json = response.json()
-    if sc == 200 and not json['ok']:
-        raise SFBaseException(sc, json)
-    return sc, json
+    return _client._make_request(path, type_=type_, data=data, headers=headers, body=body)
@@ -0,0 +1,457 @@
+import glob
+import os
+
+import numpy as np
+
+from constants import (
+    DEFAULT_INDEX_INTERVAL,
+    DEFAULT_SEGMENT_RECORDS,
+)
+from timestamps import (
+    format_ns,
+    parse_ts,
+)
+from timeseries import QUOTE_FIELDS
+
+QUOTES = 'quotes'
+LEVELS = 'levels'
+FILLS = 'fills'
+
+QUOTE_RECORD = np.dtype(
+    [('ts', np.int64)] +
+    [(field, np.float64) for field in QUOTE_FIELDS + ('bidDepth', 'askDepth')] +
+    [('lastTrade', np.int64)]
+)
+LEVEL_RECORD = np.dtype([
+    ('ts', np.int64),
+    ('price', np.int64),
+    ('qty', np.int64),
+    ('level', np.int32),
+    ('isBuy', np.bool_),
+])
+FILL_RECORD = np.dtype([
+    ('ts', np.int64),
+    ('price', np.int64),
+    ('qty', np.int64),
+    ('id', np.int64),
+    ('isBuy', np.bool_),
+])
+INDEX_RECORD = np.dtype([('ts', np.int64), ('position', np.int64)])
+
+RECORDS = {
+    QUOTES: QUOTE_RECORD,
+    LEVELS: LEVEL_RECORD,
+    FILLS: FILL_RECORD,
+}
+# Kinds written in arrival order rather than time order: the fills of different orders (and
+# even of one order) can be reported out of time order, and none may be lost
+UNORDERED = frozenset([FILLS])
+
+
+def _segment_path(directory, kind, segment):
+    return os.path.join(directory, '{}-{:06d}.dat'.format(kind, segment))
+
+
+def _index_path(data_path):
+    return data_path[:-len('.dat')] + '.idx'
+
+
+def _segments(directory, kind):
+    paths = glob.glob(os.path.join(directory, '{}-[0-9]*.dat'.format(kind)))
+    return sorted(int(os.path.basename(path)[len(kind) + 1:-len('.dat')]) for path in paths)
+
+
+class _SegmentWriter(object):
+    '''
+    Appends the records of one kind for one stock, starting a new segment file every \
+    ``segment_records`` records and adding an index entry every ``index_interval``. Kinds \
+    in :py:data:`UNORDERED` are not indexed.
+    '''
+
+    def __init__(self, directory, kind, segment_records, index_interval):
+        self.directory = directory
+        self.kind = kind
+        self.dtype = RECORDS[kind]
+        self.segment_records = segment_records
+        self.index_interval = index_interval
+        self.last_ts = None
+
+        segments = _segments(directory, kind)
+        self.segment = segments[-1] if segments else 0
+        path = _segment_path(directory, kind, self.segment)
+        self.count = os.path.getsize(path) // self.dtype.itemsize if segments else 0
+        if self.count:
+            last = np.memmap(path, dtype=self.dtype, mode='r', shape=(self.count,))[-1]
+            self.last_ts = int(last['ts'])
+        self._open()
+
+    def write(self, records):
+        if self.count and self.count + len(records) > self.segment_records:
+            self.close()
+            self.segment += 1
+            self.count = 0
+            self._open()
+
+        if self.kind not in UNORDERED and self.count >= self._next_index:
+            entry = np.array([(records['ts'][0], self.count)], dtype=INDEX_RECORD)
+            self._index.write(entry.tobytes())
+            self._next_index = self.count - self.count % self.index_interval + self.index_interval
+        self._data.write(records.tobytes())
+        self.count += len(records)
+        self.last_ts = int(records['ts'][-1])
+
+    def flush(self):
+        self._index.flush()
+        self._data.flush()
+
+    def close(self):
+        self._index.close()
+        self._data.close()
+
+    def _open(self):
+        path = _segment_path(self.directory, self.kind, self.segment)
+        self._data = open(path, 'ab')
+        self._index = open(_index_path(path), 'ab')
+        interval = self.index_interval
+        self._next_index = (self.count + interval - 1) // interval * interval
+
+
+class ArchiveWriter(object):
+    '''
+    Archives quotes, orderbooks and fills as fixed-width binary records.
+
+    Every stock gets a directory ``root/<venue>/<symbol>`` with append-only segment files \
+    per kind of record (:py:data:`QUOTE_RECORD`, :py:data:`LEVEL_RECORD` with one record per \
+    level of each book and :py:data:`FILL_RECORD`), each next to a sparse index of the \
+    timestamp of every ``index_interval`` th record. :py:class:`ArchiveReader` maps the \
+    files straight into numpy arrays.
+
+    Quotes and books must be written in time order: those no newer than the last one \
+    written for the stock (e.g. a slow poll which returned out of order) are dropped and \
+    counted in ``dropped``. Fills are never dropped; they are appended in the order they \
+    are written, whatever their timestamps, and the fills each order already has in the \
+    archive are counted from the files when a stock's fills are first written, so a \
+    restarted writer does not archive them twice. Prices missing from a quote are stored \
+    as ``nan`` and a missing ``lastTrade`` as ``0``.
+
+    :param root: the directory to archive into, created if it does not exist
+    :param segment_records: the number of records per segment file
+    :param index_interval: the number of records between index entries
+    '''
+
+    def __init__(
+        self,
+        root,
+        segment_records=DEFAULT_SEGMENT_RECORDS,
+        index_interval=DEFAULT_INDEX_INTERVAL,
+    ):
+        self.root = root
+        self.segment_records = segment_records
+        self.index_interval = index_interval
+        self.dropped = 0
+        self._writers = {}
+        self._fills = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_quote(self, quote):
+        '''
+        :param quote: a :py:class:`Quote`, :py:class:`records.FastRecord` or raw quote json
+
+        :rtype: boolean
+        :return: ``False`` if the quote was dropped
+        '''
+        raw = quote if isinstance(quote, dict) else quote.json
+        writer = self._writer(raw['venue'], raw['symbol'], QUOTES)
+        ts = parse_ts(raw['quoteTime'])
+        if writer.last_ts is not None and ts <= writer.last_ts:
+            self.dropped += 1
+            return False
+
+        record = np.zeros(1, dtype=QUOTE_RECORD)
+        record['ts'] = ts
+        for field in QUOTE_FIELDS + ('bidDepth', 'askDepth'):
+            value = raw.get(field)
+            record[field] = np.nan if value is None else value
+        record['lastTrade'] = parse_ts(raw.get('lastTrade')) or 0
+        writer.write(record)
+        return True
+
+    def write_orderbook(self, book):
+        '''
+        :param book: an :py:class:`Orderbook`, :py:class:`records.FastRecord` or raw \
+            orderbook json. A book with no levels at all is not recorded.
+
+        :rtype: boolean
+        :return: ``False`` if the book was dropped
+        '''
+        raw = book if isinstance(book, dict) else book.json
+        writer = self._writer(raw['venue'], raw['symbol'], LEVELS)
+        ts = parse_ts(raw['ts'])
+        if writer.last_ts is not None and ts <= writer.last_ts:
+            self.dropped += 1
+            return False
+
+        bids = raw.get('bids') or []
+        asks = raw.get('asks') or []
+        if not bids and not asks:
+            return True
+        records = np.empty(len(bids) + len(asks), dtype=LEVEL_RECORD)
+        records['ts'] = ts
+        records['level'][:len(bids)] = np.arange(len(bids))
+        records['level'][len(bids):] = np.arange(len(asks))
+        records['isBuy'][:len(bids)] = True
+        records['isBuy'][len(bids):] = False
+        levels = bids + asks
+        records['price'] = [level['price'] for level in levels]
+        records['qty'] = [level['qty'] for level in levels]
+        writer.write(records)
+        return True
+
+    def write_fills(self, order):
+        '''
+        :param order: an :py:class:`Order`, :py:class:`records.FastRecord` or raw order json
+
+        :rtype: integer
+        :return: the number of new fills written. Fills of the order written by an earlier \
+            call, or already in the archive from an earlier session, are skipped, so the \
+            same order can be written every time it is polled.
+        '''
+        raw = order if isinstance(order, dict) else order.json
+        fills = raw.get('fills') or []
+        if not fills:
+            return 0
+
+        # opening the writer first loads the fills already archived for the stock
+        writer = self._writer(raw['venue'], raw['symbol'], FILLS)
+        # order ids are only unique per venue
+        key = (raw['venue'], raw['id'])
+        written = self._fills.get(key, 0)
+        if len(fills) <= written:
+            return 0
+
+        new = sorted(fills[written:], key=lambda fill: fill['ts'])
+        records = np.empty(len(new), dtype=FILL_RECORD)
+        records['ts'] = [parse_ts(fill['ts']) for fill in new]
+        records['price'] = [fill['price'] for fill in new]
+        records['qty'] = [fill['qty'] for fill in new]
+        records['id'] = raw['id']
+        records['isBuy'] = raw['direction'] == 'buy'
+        writer.write(records)
+        self._fills[key] = len(fills)
+        return len(records)
+
+    def flush(self):
+        for writer in self._writers.values():
+            writer.flush()
+
+    def close(self):
+        writers, self._writers = self._writers, {}
+        for writer in writers.values():
+            writer.close()
+
+    def _writer(self, venue, symbol, kind):
+        key = (venue, symbol, kind)
+        writer = self._writers.get(key)
+        if writer is None:
+            directory = os.path.join(self.root, venue, symbol)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            writer = self._writers[key] = _SegmentWriter(
+                directory, kind, self.segment_records, self.index_interval,
+            )
+            if kind == FILLS:
+                self._load_fills(venue, directory)
+        return writer
+
+    def _load_fills(self, venue, directory):
+        # every order's fills are archived in order, so the number of records with its id is
+        # the number of its fills already written
+        for segment in _segments(directory, FILLS):
+            ids = np.fromfile(_segment_path(directory, FILLS, segment), dtype=FILL_RECORD)['id']
+            for id_, count in zip(*np.unique(ids, return_counts=True)):
+                key = (venue, int(id_))
+                self._fills[key] = self._fills.get(key, 0) + int(count)
+
+
+def _ns(ts):
+    if ts is None or not isinstance(ts, basestring):
+        return ts
+    return parse_ts(ts)
+
+
+class ArchiveReader(object):
+    '''
+    Reads an archive written by :py:class:`ArchiveWriter` through memory maps.
+
+    Time ranges are found with the sparse index and a binary search over the timestamps of \
+    the block it points to, and come back as views of the mapped files, so nothing is \
+    parsed or copied and only the pages actually read are loaded from disk. Files which \
+    are still being written to can be read; records appended after a file was mapped show \
+    up on the next read. Fills, which are archived in arrival order, are found by a scan \
+    instead and come back as one copied array sorted by time.
+
+    :param root: the directory the archive was written to
+    '''
+
+    def __init__(self, root):
+        self.root = root
+        self._maps = {}
+
+    def symbols(self):
+        '''
+        :rtype: list
+        :return: the ``(venue, symbol)`` tuples in the archive
+        '''
+        return sorted(
+            tuple(os.path.relpath(path, self.root).split(os.sep))
+            for path in glob.glob(os.path.join(self.root, '*', '*'))
+            if os.path.isdir(path)
+        )
+
+    def read(self, venue, symbol, kind, start=None, end=None):
+        '''
+        :param venue: the venue
+        :param symbol: the stock symbol
+        :param kind: one of :py:data:`QUOTES`, :py:data:`LEVELS` or :py:data:`FILLS`
+        :param start: the earliest timestamp to include, as a string or nanoseconds since \
+            the epoch. If None or unspecified, reads from the beginning.
+        :param end: the timestamp to read up to, exclusive. If None or unspecified, reads to \
+            the end.
+
+        :rtype: list
+        :return: read-only record arrays, one view per segment file the range touches. Use \
+            :py:func:`numpy.concatenate` to get a single (copied) array. Fills come back \
+            as at most one copied array, sorted by time.
+        '''
+        start, end = _ns(start), _ns(end)
+        directory = os.path.join(self.root, venue, symbol)
+        if kind in UNORDERED:
+            return self._scan(directory, kind, start, end)
+        views = []
+        for segment in _segments(directory, kind):
+            data, index = self._map(_segment_path(directory, kind, segment), RECORDS[kind])
+            if not len(data):
+                continue
+            if end is not None and data['ts'][0] >= end:
+                break
+            if start is not None and data['ts'][-1] < start:
+                continue
+            lo = 0 if start is None else self._position(data, index, start)
+            hi = len(data) if end is None else self._position(data, index, end)
+            if hi > lo:
+                views.append(data[lo:hi])
+        return views
+
+    def quotes(self, venue, symbol, start=None, end=None):
+        return self.read(venue, symbol, QUOTES, start, end)
+
+    def levels(self, venue, symbol, start=None, end=None):
+        return self.read(venue, symbol, LEVELS, start, end)
+
+    def fills(self, venue, symbol, start=None, end=None):
+        return self.read(venue, symbol, FILLS, start, end)
+
+    def close(self):
+        self._maps.clear()
+
+    def _scan(self, directory, kind, start, end):
+        selected = []
+        for segment in _segments(directory, kind):
+            data, _ = self._map(_segment_path(directory, kind, segment), RECORDS[kind])
+            keep = np.ones(len(data), dtype=np.bool_)
+            if start is not None:
+                keep &= data['ts'] >= start
+            if end is not None:
+                keep &= data['ts'] < end
+            selected.append(data[keep])
+        if not selected:
+            return []
+        records = np.concatenate(selected)
+        if not len(records):
+            return []
+        return [records[np.argsort(records['ts'], kind='mergesort')]]
+
+    def _map(self, path, dtype):
+        count = os.path.getsize(path) // dtype.itemsize
+        mapped = self._maps.get(path)
+        if mapped is None or len(mapped[0]) != count:
+            if count:
+                data = np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+            else:
+                data = np.empty(0, dtype=dtype)
+            index = np.fromfile(_index_path(path), dtype=INDEX_RECORD)
+            mapped = self._maps[path] = (data, index[index['position'] < count])
+        return mapped
+
+    def _position(self, data, index, ts):
+        # every record between two index entries is at least as new as the first one, so the
+        # first record at or after ts is between the last entry before ts and the one after it
+        block = max(np.searchsorted(index['ts'], ts, 'left') - 1, 0)
+        lo = index['position'][block] if len(index) else 0
+        hi = index['position'][block + 1] if block + 1 < len(index) else len(data)
+        return lo + int(np.searchsorted(data['ts'][lo:hi], ts, 'left'))
+
+
+def quote_json(record, venue, symbol):
+    '''
+    :param record: a :py:data:`QUOTE_RECORD`
+    :param venue: the venue of the quote
+    :param symbol: the stock symbol
+
+    :rtype: dictionary
+    :return: the quote as raw quote json, which can be loaded into a :py:class:`Quote`
+    '''
+    raw = {'ok': True, 'venue': venue, 'symbol': symbol, 'quoteTime': format_ns(record['ts'])}
+    for field in QUOTE_FIELDS + ('bidDepth', 'askDepth'):
+        if not np.isnan(record[field]):
+            raw[field] = int(record[field])
+    if record['lastTrade']:
+        raw['lastTrade'] = format_ns(record['lastTrade'])
+    return raw
+
+
+def orderbook_json(levels, venue, symbol):
+    '''
+    :param levels: the :py:data:`LEVEL_RECORD` array of a single book
+    :param venue: the venue of the book
+    :param symbol: the stock symbol
+
+    :rtype: dictionary
+    :return: the book as raw orderbook json, which can be loaded into an \
+        :py:class:`Orderbook` or passed to :py:func:`depth.book_arrays`
+    '''
+    def side(records):
+        return [
+            {'price': int(record['price']), 'qty': int(record['qty']),
+             'isBuy': bool(record['isBuy'])}
+            for record in np.sort(records, order='level')
+        ]
+
+    return {
+        'ok': True,
+        'venue': venue,
+        'symbol': symbol,
+        'bids': side(levels[levels['isBuy']]),
+        'asks': side(levels[~levels['isBuy']]),
+        'ts': format_ns(levels['ts'][0]),
+    }
+
+
+def iter_orderbooks(levels, venue, symbol):
+    '''
+    :param levels: a :py:data:`LEVEL_RECORD` array e.g. as returned by \
+        :py:meth:`ArchiveReader.levels`
+    :param venue: the venue of the books
+    :param symbol: the stock symbol
+
+    :return: a generator of every book in ``levels`` as raw orderbook json, oldest first
+    '''
+    bounds = np.flatnonzero(np.diff(levels['ts'])) + 1
+    for book in np.split(levels, bounds):
+        if len(book):
+            yield orderbook_json(book, venue, symbol)
@@ -0,0 +1,110 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import api
+from constants import DEFAULT_MAX_CONCURRENCY
+
+
+class AsyncClient(object):
+    '''
+    Non-blocking equivalents of the functions in :py:mod:`api`.
+
+    Every method takes the same arguments as its :py:mod:`api` counterpart but returns a \
+    :py:class:`concurrent.futures.Future` immediately instead of blocking on the response. \
+    The future resolves to the same schematics object or raises the same \
+    :py:exception:`SFBaseException` the blocking call would.
+
+    At most ``max_concurrency`` requests are in flight at once; the rest queue up and can be \
+    cancelled with :py:meth:`Future.cancel` or :py:meth:`cancel_pending` until they start. \
+    The default :py:class:`transport.Transport` pool matches the default concurrency; when \
+    raising ``max_concurrency``, size the pool to match so that every in flight request \
+    gets a persistent connection.
+
+    :param max_concurrency: the maximum number of requests in flight. Defaults to \
+        :py:data:`DEFAULT_MAX_CONCURRENCY`.
+    :param client: the :py:class:`client.Client` to send requests through. If None or \
+        unspecified, the functions in :py:mod:`api` are used.
+    '''
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, client=None):
+        self.max_concurrency = max_concurrency
+        self.client = client if client is not None else api
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close(cancel_pending=exc_info[0] is not None)
+
+    def submit(self, fn, *args, **kwargs):
+        '''
+        :param fn: a callable, usually a method of the client
+
+        :rtype: :py:class:`concurrent.futures.Future`
+        :return: a future for ``fn(*args, **kwargs)``
+        '''
+        future = self._executor.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def healthcheck(self, venue=None):
+        return self.submit(self.client.healthcheck, venue)
+
+    def get_stocks(self, *args, **kwargs):
+        return self.submit(self.client.get_stocks, *args, **kwargs)
+
+    def get_orderbook(self, *args, **kwargs):
+        return self.submit(self.client.get_orderbook, *args, **kwargs)
+
+    def get_quote(self, *args, **kwargs):
+        return self.submit(self.client.get_quote, *args, **kwargs)
+
+    def order_status(self, id_, *args, **kwargs):
+        return self.submit(self.client.order_status, id_, *args, **kwargs)
+
+    def delete_order(self, id_, *args, **kwargs):
+        return self.submit(self.client.delete_order, id_, *args, **kwargs)
+
+    def all_orders(self, *args, **kwargs):
+        return self.submit(self.client.all_orders, *args, **kwargs)
+
+    def buy_stock(self, quantity, **kwargs):
+        return self.submit(self.client.buy_stock, quantity, **kwargs)
+
+    def sell_stock(self, quantity, **kwargs):
+        return self.submit(self.client.sell_stock, quantity, **kwargs)
+
+    def trade_stock(self, quantity, direction, **kwargs):
+        return self.submit(self.client.trade_stock, quantity, direction, **kwargs)
+
+    def cancel_pending(self):
+        '''
+        :rtype: integer
+        :return: the number of queued requests that were cancelled
+
+        Cancels every request which has not been sent yet. Requests already in flight run \
+        to completion.
+        '''
+        with self._lock:
+            pending = list(self._pending)
+        return sum(1 for future in pending if future.cancel())
+
+    def close(self, cancel_pending=False):
+        '''
+        :param cancel_pending: if ``True``, queued requests are cancelled instead of sent
+
+        Waits for in flight requests to finish and shuts down the worker threads.
+        '''
+        if cancel_pending:
+            self.cancel_pending()
+        self._executor.shutdown(wait=True)
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
@@ -0,0 +1,89 @@
+from collections import namedtuple
+
+import api
+from async_api import AsyncClient
+from constants import (
+    TEST_EXCHANGE,
+    DEFAULT_MAX_CONCURRENCY,
+)
+
+
+class BatchResult(namedtuple('BatchResult', ['request', 'order', 'error'])):
+    '''
+    The outcome of one request in a batch. ``request`` is what was asked for (the order spec \
+    or the order being cancelled), ``order`` is the resulting :py:class:`Order` and ``error`` \
+    is the exception raised instead, if any.
+    '''
+    __slots__ = ()
+
+
+def submit_orders(orders, client):
+    '''
+    :param orders: a list of dicts of keyword arguments to :py:func:`api.trade_stock` \
+        e.g. ``{'quantity': 10, 'direction': 'buy', 'price': 51.5, 'order_type': 'limit'}``
+    :param client: the :py:class:`AsyncClient` to submit the orders through
+
+    :rtype: list of :py:class:`concurrent.futures.Future`
+    :return: one future per order, in the same order as ``orders``
+
+    Submits every order without waiting for any of them to complete.
+    '''
+    return [client.trade_stock(**spec) for spec in orders]
+
+
+def place_orders(orders, max_concurrency=DEFAULT_MAX_CONCURRENCY, client=None):
+    '''
+    :param orders: a list of dicts of keyword arguments to :py:func:`api.trade_stock`
+    :param max_concurrency: the maximum number of orders in flight at once
+    :param client: the :py:class:`client.Client` to place the orders with. If None or \
+        unspecified, the functions in :py:mod:`api` are used.
+
+    :rtype: list of :py:class:`BatchResult`
+    :return: one result per order, in the same order as ``orders``
+
+    Places every order in parallel and waits for all of them. An order that fails does not \
+    stop the others; its exception is reported in the ``error`` field of its result.
+    '''
+    with AsyncClient(max_concurrency, client=client) as async_client:
+        futures = submit_orders(orders, async_client)
+        return [_result(spec, future) for spec, future in zip(orders, futures)]
+
+
+def cancel_all(
+    exchange=TEST_EXCHANGE,
+    stock=None,
+    max_concurrency=DEFAULT_MAX_CONCURRENCY,
+    client=None,
+):
+    '''
+    :param exchange: a string with the exchange name (case sesitive). \
+        Defaults to :py:data:`TEST_EXCHANGE`.
+    :param stock: narrows the cancels down to a single stock. Defaults to ``None``.
+    :param max_concurrency: the maximum number of cancels in flight at once
+    :param client: the :py:class:`client.Client` whose orders to cancel. If None or \
+        unspecified, the functions in :py:mod:`api` are used.
+
+    :rtype: list of :py:class:`BatchResult`
+    :return: one result per open order, with the order as it was before the cancel in \
+        ``request``
+
+    Cancels every open order of the client's account on an exchange. The open orders are \
+    found with a single :py:func:`api.all_orders` request and the cancels are sent in \
+    parallel. A cancel that fails does not stop the others.
+    '''
+    client = client if client is not None else api
+    open_orders = [order for order in client.all_orders(exchange, stock).orders if order.open]
+
+    with AsyncClient(max_concurrency, client=client) as async_client:
+        futures = [
+            async_client.delete_order(order.id, exchange=order.venue, stock=order.symbol)
+            for order in open_orders
+        ]
+        return [_result(order, future) for order, future in zip(open_orders, futures)]
+
+
+def _result(request, future):
+    try:
+        return BatchResult(request, future.result(), None)
+    except Exception as e:
+        return BatchResult(request, None, e)
@@ -0,0 +1,263 @@
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+from constants import DEFAULT_KEYFRAME_INTERVAL
+from timestamps import format_ns, parse_ts
+
+BID = 'bid'
+ASK = 'ask'
+
+
+class LevelDelta(namedtuple('LevelDelta', ['side', 'price', 'qty'])):
+    '''
+    A price level which changed between two snapshots of a book: ``side`` is :py:data:`BID` \
+    or :py:data:`ASK` and ``qty`` is the new quantity at ``price``, ``0`` if the level is gone.
+    '''
+    __slots__ = ()
+
+
+def book_levels(book):
+    '''
+    :param book: an :py:class:`Orderbook`, a :py:class:`records.FastRecord` orderbook or the \
+        raw orderbook json
+
+    :rtype: (dict, dict)
+    :return: the bids and the asks of the book as dicts of price to quantity
+    '''
+    raw = book if isinstance(book, dict) else book.json
+    return (
+        dict((level['price'], level['qty']) for level in raw.get('bids') or ()),
+        dict((level['price'], level['qty']) for level in raw.get('asks') or ()),
+    )
+
+
+def _diff(side, old, new):
+    deltas = [LevelDelta(side, price, 0) for price in old if price not in new]
+    for price, qty in new.iteritems():
+        if old.get(price) != qty:
+            deltas.append(LevelDelta(side, price, qty))
+    return deltas
+
+
+def diff_levels(old, new):
+    '''
+    :param old: the ``(bids, asks)`` of a book as returned by :py:func:`book_levels`
+    :param new: the ``(bids, asks)`` of a later snapshot of it
+
+    :rtype: list
+    :return: the :py:class:`LevelDelta` objects which turn ``old`` into ``new``
+    '''
+    return _diff(BID, old[0], new[0]) + _diff(ASK, old[1], new[1])
+
+
+def diff_books(old, new):
+    '''
+    :param old: a book in any form :py:func:`book_levels` accepts
+    :param new: a later snapshot of the same book
+
+    :rtype: list
+    :return: the :py:class:`LevelDelta` objects which turn ``old`` into ``new``
+    '''
+    return diff_levels(book_levels(old), book_levels(new))
+
+
+def apply_deltas(levels, deltas):
+    '''
+    :param levels: the ``(bids, asks)`` of a book, updated in place
+    :param deltas: :py:class:`LevelDelta` objects or ``(side, price, qty)`` tuples
+    '''
+    for side, price, qty in deltas:
+        prices = levels[0] if side == BID else levels[1]
+        if qty:
+            prices[price] = qty
+        else:
+            prices.pop(price, None)
+
+
+class BookHistory(object):
+    '''
+    Every snapshot of one stock's orderbook, stored as the level changes between them.
+
+    Each snapshot appended is diffed against the previous one and only the changed levels \
+    are kept, packed into a flat integer array. Every ``keyframe_interval`` snapshots a full \
+    copy of the levels is kept as well, packed the same way, so rebuilding any past book \
+    applies at most ``keyframe_interval - 1`` snapshots' worth of deltas to the keyframe \
+    before it. Timestamps are kept as nanoseconds only and formatted again on the way out.
+
+    :param venue: the venue of the stock
+    :param symbol: the stock symbol
+    :param keyframe_interval: snapshots between full copies of the book
+    '''
+
+    def __init__(self, venue, symbol, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        self.venue = venue
+        self.symbol = symbol
+        self.keyframe_interval = keyframe_interval
+        self.levels = ({}, {})
+        self._ts_ns = array('l')
+        # the deltas of snapshot i are _deltas[3 * _offsets[i]:3 * _offsets[i + 1]] as
+        # (is bid, price, qty) triples
+        self._deltas = array('l')
+        self._offsets = array('l', [0])
+        # (bids, asks) as flat arrays of price, qty pairs
+        self._keyframes = []
+
+    def __len__(self):
+        return len(self._ts_ns)
+
+    @property
+    def delta_count(self):
+        return self._offsets[-1]
+
+    def append(self, book):
+        '''
+        :param book: the next snapshot, in any form :py:func:`book_levels` accepts
+
+        :rtype: list
+        :return: the :py:class:`LevelDelta` objects since the previous snapshot, or ``None`` \
+            if the snapshot is older than the previous one and was dropped
+        '''
+        raw = book if isinstance(book, dict) else book.json
+        ts_ns = parse_ts(raw['ts'])
+        if self._ts_ns and ts_ns < self._ts_ns[-1]:
+            return None
+
+        levels = book_levels(raw)
+        deltas = diff_levels(self.levels, levels)
+        for side, price, qty in deltas:
+            self._deltas.extend((side == BID, price, qty))
+        self._offsets.append(self._offsets[-1] + len(deltas))
+        if len(self._ts_ns) % self.keyframe_interval == 0:
+            self._keyframes.append(tuple(
+                array('l', [n for level in prices.iteritems() for n in level])
+                for prices in levels
+            ))
+        self._ts_ns.append(ts_ns)
+        self.levels = levels
+        return deltas
+
+    def deltas(self, index):
+        '''
+        :param index: the position of the snapshot, negative indices count from the end
+
+        :rtype: list
+        :return: the :py:class:`LevelDelta` objects between the snapshot and the one before
+        '''
+        index = self._index(index)
+        flat = self._deltas[3 * self._offsets[index]:3 * self._offsets[index + 1]]
+        return [
+            LevelDelta(BID if flat[i] else ASK, flat[i + 1], flat[i + 2])
+            for i in xrange(0, len(flat), 3)
+        ]
+
+    def levels_at(self, index):
+        '''
+        :param index: the position of the snapshot, negative indices count from the end
+
+        :rtype: (dict, dict)
+        :return: the bids and asks of the snapshot as dicts of price to quantity
+        '''
+        index = self._index(index)
+        keyframe = index // self.keyframe_interval
+        levels = tuple(
+            dict(zip(flat[::2], flat[1::2])) for flat in self._keyframes[keyframe]
+        )
+        start = 3 * self._offsets[keyframe * self.keyframe_interval + 1]
+        flat = self._deltas[start:3 * self._offsets[index + 1]]
+        for i in xrange(0, len(flat), 3):
+            prices = levels[0] if flat[i] else levels[1]
+            if flat[i + 2]:
+                prices[flat[i + 1]] = flat[i + 2]
+            else:
+                prices.pop(flat[i + 1], None)
+        return levels
+
+    def book(self, index):
+        '''
+        :param index: the position of the snapshot, negative indices count from the end
+
+        :rtype: dictionary
+        :return: the snapshot rebuilt as raw orderbook json, which can be loaded into an \
+            :py:class:`Orderbook` or passed to :py:func:`depth.book_arrays`
+        '''
+        index = self._index(index)
+        bids, asks = self.levels_at(index)
+        return {
+            'ok': True,
+            'venue': self.venue,
+            'symbol': self.symbol,
+            'bids': [
+                {'price': price, 'qty': bids[price], 'isBuy': True}
+                for price in sorted(bids, reverse=True)
+            ],
+            'asks': [
+                {'price': price, 'qty': asks[price], 'isBuy': False}
+                for price in sorted(asks)
+            ],
+            'ts': format_ns(self._ts_ns[index]),
+        }
+
+    def index_at(self, ts):
+        '''
+        :param ts: a timestamp string or nanoseconds since the epoch
+
+        :rtype: integer
+        :return: the position of the last snapshot taken at or before ``ts``, ``None`` if \
+            there is none
+        '''
+        if isinstance(ts, basestring):
+            ts = parse_ts(ts)
+        index = bisect_right(self._ts_ns, ts) - 1
+        return index if index >= 0 else None
+
+    def book_at(self, ts):
+        '''
+        :param ts: a timestamp string or nanoseconds since the epoch
+
+        :rtype: dictionary
+        :return: the book as of ``ts`` as raw orderbook json, ``None`` if it had not been \
+            seen yet
+        '''
+        index = self.index_at(ts)
+        return self.book(index) if index is not None else None
+
+    def _index(self, index):
+        if index < 0:
+            index += len(self._ts_ns)
+        if not 0 <= index < len(self._ts_ns):
+            raise IndexError('snapshot index out of range')
+        return index
+
+
+class BookHistories(object):
+    '''
+    A :py:class:`BookHistory` per ``(venue, symbol)``, created as books for it arrive.
+
+    :param keyframe_interval: the keyframe interval of each history
+    '''
+
+    def __init__(self, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.histories = {}
+
+    def __getitem__(self, key):
+        return self.histories[key]
+
+    def __contains__(self, key):
+        return key in self.histories
+
+    def append(self, book):
+        '''
+        :rtype: list
+        :return: the deltas since the previous snapshot of the same stock, see \
+            :py:meth:`BookHistory.append`
+        '''
+        raw = book if isinstance(book, dict) else book.json
+        key = (raw['venue'], raw['symbol'])
+        history = self.histories.get(key)
+        if history is None:
+            history = self.histories[key] = BookHistory(
+                key[0], key[1], self.keyframe_interval,
+            )
+        return history.append(raw)
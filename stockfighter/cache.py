@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+
+import api
+from constants import (
+    TEST_EXCHANGE,
+    TEST_STOCK,
+    DEFAULT_QUOTE_TTL,
+    DEFAULT_ORDERBOOK_TTL,
+    DEFAULT_CACHE_SIZE,
+)
+
+
+class _Flight(object):
+    '''
+    A request in progress which callers asking for the same key wait on.
+    '''
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class MarketDataCache(object):
+    '''
+    A read through cache in front of :py:func:`api.get_quote` and :py:func:`api.get_orderbook`.
+
+    Responses are reused for ``quote_ttl`` or ``orderbook_ttl`` seconds and at most \
+    ``max_entries`` of them are kept, evicting the least recently used. Callers asking for a \
+    key that is already being fetched wait for that request instead of sending their own, \
+    so concurrent callers cost one request between them even with a ttl of ``0``.
+
+    :param quote_ttl: seconds a quote is served from the cache
+    :param orderbook_ttl: seconds an orderbook is served from the cache
+    :param max_entries: the maximum number of responses kept across all stocks
+    :param client: the :py:class:`client.Client` to fetch with. If None or unspecified, the \
+        functions in :py:mod:`api` are used.
+    '''
+
+    def __init__(
+        self,
+        quote_ttl=DEFAULT_QUOTE_TTL,
+        orderbook_ttl=DEFAULT_ORDERBOOK_TTL,
+        max_entries=DEFAULT_CACHE_SIZE,
+        client=None,
+    ):
+        self.client = client if client is not None else api
+        self.ttls = {
+            'quote': quote_ttl,
+            'orderbook': orderbook_ttl,
+        }
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_quote(self, exchange=TEST_EXCHANGE, stock=TEST_STOCK):
+        '''
+        Same as :py:func:`api.get_quote`, served from the cache when fresh.
+        '''
+        return self._get('quote', self.client.get_quote, exchange, stock)
+
+    def get_orderbook(self, exchange=TEST_EXCHANGE, stock=TEST_STOCK):
+        '''
+        Same as :py:func:`api.get_orderbook`, served from the cache when fresh.
+        '''
+        return self._get('orderbook', self.client.get_orderbook, exchange, stock)
+
+    def invalidate(self, exchange=None, stock=None):
+        '''
+        :param exchange: only drop entries for this exchange. If None, drops every exchange.
+        :param stock: only drop entries for this stock. If None, drops every stock.
+        '''
+        with self._lock:
+            for key in list(self._entries):
+                _, key_exchange, key_stock = key
+                if exchange in (None, key_exchange) and stock in (None, key_stock):
+                    del self._entries[key]
+
+    def stats(self):
+        '''
+        :rtype: dictionary
+        :return: the hit, miss and coalesce counters and the number of cached entries
+        '''
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'entries': len(self._entries),
+        }
+
+    def _get(self, endpoint, fetch, exchange, stock):
+        key = (endpoint, exchange, stock)
+        leader = False
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] > time.time():
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[1]
+
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+            else:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            return flight.wait()
+
+        try:
+            flight.value = fetch(exchange, stock)
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            with self._lock:
+                self._entries[key] = (time.time() + self.ttls[endpoint], flight.value)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return flight.value
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
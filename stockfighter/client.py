@@ -0,0 +1,306 @@
+import json
+import time
+
+import requests
+
+import config
+import records
+from codec import OrderTemplate
+from constants import (
+    TEST_EXCHANGE,
+    MARKET_ORDER,
+    TEST_STOCK,
+)
+from exceptions import (
+    HealthcheckFailed,
+    SFBaseException,
+    UnknownExchange,
+    BadRequest,
+    Unauthorized,
+)
+from transport import (
+    Transport,
+    endpoint_of,
+    get_transport,
+)
+from validators import (
+    Stocks,
+    Orderbook,
+    Order,
+    Orders,
+    Quote,
+)
+
+
+class Client(object):
+    '''
+    A stockfighter API client with its own credentials and transport.
+
+    Every function in :py:mod:`api` is available as a method with the same arguments. \
+    Clients share no state with each other, so any number of them, for different accounts \
+    or levels, can be used side by side from different threads.
+
+    :param account: the trading account orders are placed for. If None or unspecified, \
+        the account in :py:mod:`config` is used, as of each call.
+    :param api_key: the stockfighter api key
+    :param api_base: the url all paths are relative to. Defaults to :py:data:`SF_API_BASE`.
+    :param transport: the :py:class:`transport.Transport` to send requests through. If None \
+        or unspecified, a new one is created from ``api_key``, ``api_base`` and any other \
+        keyword arguments (e.g. ``pool_size``). If none of those are given either, the \
+        client uses the module transport returned by :py:func:`transport.get_transport`, \
+        as :py:mod:`api` does.
+    '''
+
+    def __init__(self, account=None, api_key=None, api_base=None, transport=None, **kwargs):
+        if transport is None and (api_key is not None or api_base is not None or kwargs):
+            if api_base is not None:
+                kwargs['api_base'] = api_base
+            transport = Transport(api_key=api_key, **kwargs)
+
+        self._account = account
+        self._transport = transport
+        # None loads responses into schematics models, True or False into
+        # records.FastRecord with or without validation. See use_fast_models.
+        self.fast_models = None
+        # a clocksync.ClockSync annotating responses, see use_clock_sync
+        self.clock_sync = None
+        self._templates = {}
+
+    @classmethod
+    def from_key_file(cls, account, key_file=config.DEFAULT_KEY_FILE, **kwargs):
+        '''
+        :param account: the trading account
+        :param key_file: a json file with the api key under ``'api_key'``
+
+        :rtype: :py:class:`Client`
+        :return: a client for the account, using the key in the file
+        '''
+        with open(key_file) as f:
+            api_key = json.load(f)['api_key']
+        return cls(account=account, api_key=api_key, **kwargs)
+
+    @property
+    def account(self):
+        if self._account is None:
+            return config.get('account')
+        return self._account
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            return get_transport()
+        return self._transport
+
+    def close(self):
+        '''
+        Closes the client's pooled connections. The module transport is left open.
+        '''
+        if self._transport is not None:
+            self._transport.close()
+
+    def use_fast_models(self, enabled=True, validate=True):
+        '''
+        See :py:func:`api.use_fast_models`.
+        '''
+        self.fast_models = validate if enabled else None
+
+    def use_clock_sync(self, clock_sync):
+        '''
+        See :py:func:`api.use_clock_sync`.
+        '''
+        self.clock_sync = clock_sync
+        return clock_sync
+
+    def healthcheck(self, venue=None):
+        '''
+        See :py:func:`api.healthcheck`.
+        '''
+        if venue is None:
+            path = '/heartbeat'
+        else:
+            path = '/venues/{}/heartbeat'.format(venue)
+
+        try:
+            sc, json = self.transport.request(path)
+        except (requests.RequestException, ValueError) as e:
+            raise HealthcheckFailed(None, {'ok': False, 'error': str(e)})
+        if sc != 200 or not json.get('ok'):
+            raise HealthcheckFailed(sc, json)
+
+    def get_stocks(self, exchange=TEST_EXCHANGE):
+        '''
+        See :py:func:`api.get_stocks`.
+        '''
+        sc, json = self._make_request('/venues/{}/stocks'.format(exchange))
+
+        if sc == 404:
+            raise UnknownExchange(404)
+
+        return self._load(Stocks, json, 'stocks')
+
+    def get_orderbook(self, exchange=TEST_EXCHANGE, stock=TEST_STOCK):
+        '''
+        See :py:func:`api.get_orderbook`.
+        '''
+        sc, json = self._make_request('/venues/{}/stocks/{}'.format(exchange, stock))
+        if sc == 404:
+            raise BadRequest(sc, json)
+        return self._load(Orderbook, json, 'orderbook')
+
+    def get_quote(self, exchange=TEST_EXCHANGE, stock=TEST_STOCK):
+        '''
+        See :py:func:`api.get_quote`.
+        '''
+        sc, json = self._make_request('/venues/{}/stocks/{}/quote'.format(exchange, stock))
+        if sc == 404:
+            raise BadRequest(sc, json)
+        return self._load(Quote, json, 'quote')
+
+    def order_status(self, id_, exchange=TEST_EXCHANGE, stock=TEST_STOCK):
+        '''
+        See :py:func:`api.order_status`.
+        '''
+        sc, json = self._make_request(
+            '/venues/{}/stocks/{}/orders/{}'.format(exchange, stock, id_)
+        )
+        if sc == 401:
+            raise Unauthorized(sc, json)
+        return self._load(Order, json, 'status')
+
+    def delete_order(self, id_, exchange=TEST_EXCHANGE, stock=TEST_STOCK):
+        '''
+        See :py:func:`api.delete_order`.
+        '''
+        sc, json = self._make_request(
+            '/venues/{}/stocks/{}/orders/{}'.format(exchange, stock, id_), type_='delete'
+        )
+        if sc == 401:
+            raise Unauthorized(sc, json)
+        return self._load(Order, json, 'cancel')
+
+    def all_orders(self, exchange=TEST_EXCHANGE, stock=None):
+        '''
+        See :py:func:`api.all_orders`.
+        '''
+        if stock is None:
+            path = '/venues/{}/accounts/{}/orders'.format(exchange, self.account)
+        else:
+            path = '/venues/{}/accounts/{}/stocks/{}/orders'.format(
+                exchange,
+                self.account,
+                stock,
+            )
+        _, json = self._make_request(path)
+        return self._load(Orders, json, 'orders')
+
+    def buy_stock(self, quantity, **kwargs):
+        '''
+        See :py:func:`api.buy_stock`.
+        '''
+        return self.trade_stock(quantity, 'buy', **kwargs)
+
+    def sell_stock(self, quantity, **kwargs):
+        '''
+        See :py:func:`api.sell_stock`.
+        '''
+        return self.trade_stock(quantity, 'sell', **kwargs)
+
+    def trade_stock(
+        self,
+        quantity,
+        direction,
+        exchange=TEST_EXCHANGE,
+        stock=TEST_STOCK,
+        price=None,
+        order_type=MARKET_ORDER,
+    ):
+        '''
+        See :py:func:`api.trade_stock`.
+        '''
+        if price is None:
+            order_type = MARKET_ORDER
+            price = 0
+        else:
+            price = int(round(price * 100))
+
+        template = self.order_template(exchange, stock, order_type)
+        sc, json = self._make_request(
+            path=template.path,
+            type_='post',
+            body=template.encode(price, quantity, direction),
+        )
+
+        if sc != 200:
+            raise BadRequest(sc, json)
+
+        return self._load(Order, json, 'order')
+
+    def order_template(self, exchange=TEST_EXCHANGE, stock=TEST_STOCK, order_type=MARKET_ORDER):
+        '''
+        :param exchange: the venue the orders are placed on
+        :param stock: the stock symbol
+        :param order_type: the order type, see :py:mod:`constants`
+
+        :rtype: :py:class:`codec.OrderTemplate`
+        :return: the pre-encoded order :py:meth:`trade_stock` uses for the client's account, \
+            created on first use
+        '''
+        key = (self.account, exchange, stock, order_type)
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates.setdefault(key, OrderTemplate(*key))
+        return template
+
+    def _load(self, validator, json, endpoint):
+        '''
+        :param validator: the schematics model to load the response into
+        :param json: the deserialized json response
+        :param endpoint: the endpoint name the response came from, see \
+            :py:func:`transport.endpoint_of`
+
+        Loads a response into its schematics model, or the matching \
+        :py:class:`records.FastRecord` if :py:meth:`use_fast_models` is on, timing it as the \
+        ``'validate'`` phase if the transport is instrumented.
+        '''
+        kwargs = {'strict': False}
+        if self.fast_models is not None:
+            validator = records.fast_model(validator)
+            kwargs = {'validate': self.fast_models}
+
+        instrumentation = getattr(self.transport, 'instrumentation', None)
+        if instrumentation is None:
+            return validator(json, **kwargs)
+
+        start = time.time()
+        try:
+            result = validator(json, **kwargs)
+        except Exception as e:
+            instrumentation.count_exception(endpoint, e)
+            raise
+        instrumentation.record(endpoint, 'validate', time.time() - start)
+        return result
+
+    def _make_request(self, path, type_='get', data=None, headers=None, body=None):
+        '''
+        :param path: The path to the stockfighter API
+        :param type_: HTTP request type in lowercase i.e. ``'get'``, ``'post'``, ``'delete'`` etc.
+        :param data: a python dict which will be serialized and sent as json
+        :param headers: headers to send along with the request
+        :param body: an already encoded json body, sent instead of ``data``
+
+        :rtype: (integer, dictionary)
+        :return: a tuple of status code and deserialized json response as a python dict
+
+        Makes the specified request to the stockfighter api through the client's \
+        :py:class:`transport.Transport`. If ``'ok'`` is not ``True`` in the response, this \
+        will raise :py:exception:`SFBaseException`.
+        '''
+        sent = time.time()
+        sc, json = self.transport.request(
+            path, type_=type_, data=data, headers=headers, body=body,
+        )
+        if sc == 200 and not json['ok']:
+            raise SFBaseException(sc, json)
+        if sc == 200 and self.clock_sync is not None:
+            self.clock_sync.observe(endpoint_of(type_, path), json, sent, time.time())
+        return sc, json
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import deque
+
+from constants import DEFAULT_CLOCK_WINDOW
+from timestamps import parse_ts
+
+# Endpoints whose timestamp is taken by the server while it handles the request, so it can be
+# used as a clock sample: an order's ts is when the matching engine took it and a book's ts
+# is when it was read. A quote's quoteTime is when the quote last changed, which can be
+# arbitrarily old.
+SAMPLE_FIELDS = {
+    'order': 'ts',
+    'orderbook': 'ts',
+}
+# The field holding the time the data in a response is from
+DATA_FIELDS = {
+    'quote': 'quoteTime',
+    'orderbook': 'ts',
+    'order': 'ts',
+    'status': 'ts',
+    'cancel': 'ts',
+}
+
+
+class ClockSync(object):
+    '''
+    Estimates the offset of the stockfighter servers' clock from the local one, NTP style.
+
+    Every response whose timestamp was taken while the server handled the request gives a \
+    sample: assuming the request and the response took equally long, the server read its \
+    clock halfway between sending and receiving, so the offset is the server time minus that \
+    midpoint, give or take half the round trip. Of the last ``window`` samples, the half \
+    with the shortest round trips (whose bounds are tightest and which are least skewed by \
+    queueing on one leg) are fitted with a line, giving the offset and its drift in seconds \
+    per second. With fewer than two such samples the offset of the fastest one is used and \
+    drift is taken as zero.
+
+    :py:meth:`observe` also annotates each response with ``staleness``, how old its data is \
+    in seconds, and ``latency``, the estimated one-way latency of the request in seconds, \
+    which :py:class:`Quote`, :py:class:`Orderbook` and :py:class:`Order` expose as \
+    attributes. Install it with :py:meth:`client.Client.use_clock_sync` or \
+    :py:func:`api.use_clock_sync`.
+
+    :param window: the number of recent samples used
+    '''
+
+    def __init__(self, window=DEFAULT_CLOCK_WINDOW):
+        self.samples = deque(maxlen=window)
+        # (local time, offset at that time, drift), replaced as a whole so readers need no lock
+        self._fit = (0.0, 0.0, 0.0)
+        self._error = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def drift(self):
+        '''
+        How fast the server clock gains on the local one, in seconds per second.
+        '''
+        return self._fit[2]
+
+    @property
+    def error(self):
+        '''
+        The bound on the offset error of the best sample, half its round trip in seconds. \
+        ``None`` before the first sample.
+        '''
+        return self._error
+
+    def sample(self, sent, received, server_ns):
+        '''
+        :param sent: the local unix time the request was sent
+        :param received: the local unix time the response was received
+        :param server_ns: the server's timestamp of the request in nanoseconds
+        '''
+        midpoint = (sent + received) / 2.0
+        with self._lock:
+            self.samples.append((midpoint, server_ns / 1e9 - midpoint, received - sent))
+            self._estimate()
+
+    def offset(self, at=None):
+        '''
+        :param at: the local unix time to estimate the offset at. Defaults to now.
+
+        :rtype: float
+        :return: the server clock minus the local clock in seconds
+        '''
+        if at is None:
+            at = time.time()
+        epoch, offset, drift = self._fit
+        return offset + drift * (at - epoch)
+
+    def server_time(self, at=None):
+        '''
+        :rtype: float
+        :return: the server's unix time at local time ``at``, by default now
+        '''
+        if at is None:
+            at = time.time()
+        return at + self.offset(at)
+
+    def staleness(self, ts, at=None):
+        '''
+        :param ts: a server timestamp as a string or in nanoseconds
+        :param at: the local unix time to measure at. Defaults to now.
+
+        :rtype: float
+        :return: how many seconds before local time ``at`` the server time ``ts`` was
+        '''
+        if isinstance(ts, basestring):
+            ts = parse_ts(ts)
+        return self.server_time(at) - ts / 1e9
+
+    def one_way_latency(self, sent, ts):
+        '''
+        :param sent: the local unix time a request was sent
+        :param ts: the server's timestamp of the request, as a string or in nanoseconds
+
+        :rtype: float
+        :return: the seconds the request took to reach the server
+        '''
+        if isinstance(ts, basestring):
+            ts = parse_ts(ts)
+        return ts / 1e9 - self.server_time(sent)
+
+    def observe(self, endpoint, json, sent, received):
+        '''
+        :param endpoint: the endpoint the response came from, see \
+            :py:func:`transport.endpoint_of`
+        :param json: the deserialized json response, annotated in place
+        :param sent: the local unix time the request was sent
+        :param received: the local unix time the response was received
+
+        Takes a sample from the response if its endpoint allows it and annotates the \
+        response with ``staleness`` as of ``received`` and ``latency``, which is measured \
+        against the server timestamp for sampled endpoints and taken as half the round \
+        trip otherwise.
+        '''
+        field = SAMPLE_FIELDS.get(endpoint)
+        server_ns = parse_ts(json.get(field)) if field is not None else None
+        if server_ns is not None:
+            self.sample(sent, received, server_ns)
+            json['latency'] = max(self.one_way_latency(sent, server_ns), 0.0)
+        else:
+            json['latency'] = (received - sent) / 2.0
+
+        field = DATA_FIELDS.get(endpoint)
+        ts = json.get(field) if field is not None else None
+        if ts is not None:
+            json['staleness'] = max(self.staleness(ts, received), 0.0)
+
+    def _estimate(self):
+        by_delay = sorted(self.samples, key=lambda sample: sample[2])
+        best = by_delay[:max(len(by_delay) // 2, 1)]
+        self._error = best[0][2] / 2.0
+
+        n = float(len(best))
+        mean_t = sum(sample[0] for sample in best) / n
+        mean_offset = sum(sample[1] for sample in best) / n
+        spread = sum((sample[0] - mean_t) ** 2 for sample in best)
+        if len(best) < 2 or spread == 0:
+            self._fit = (best[0][0], best[0][1], 0.0)
+            return
+
+        drift = sum((sample[0] - mean_t) * (sample[1] - mean_offset) for sample in best) / spread
+        self._fit = (mean_t, mean_offset, drift)
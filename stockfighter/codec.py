@@ -0,0 +1,118 @@
+import json
+from collections import namedtuple
+
+# fastest first, the stdlib json module is always available
+CODECS = ('orjson', 'ujson', 'simplejson', 'json')
+
+_DIRECTIONS = {
+    'buy': '"buy"',
+    'sell': '"sell"',
+}
+
+
+class Codec(namedtuple('Codec', ['name', 'dumps', 'loads'])):
+    '''
+    A json library: ``dumps(obj)`` returns compact json as a string (bytes for ``orjson``) \
+    and ``loads(s)`` parses a string or bytes, raising a :py:exc:`ValueError` on bad input.
+    '''
+    __slots__ = ()
+
+
+def _load_codec(name):
+    if name == 'orjson':
+        import orjson
+        return Codec(name, orjson.dumps, orjson.loads)
+    if name == 'ujson':
+        import ujson
+        return Codec(name, ujson.dumps, ujson.loads)
+    if name == 'simplejson':
+        import simplejson
+        return Codec(
+            name,
+            lambda obj: simplejson.dumps(obj, separators=(',', ':')),
+            simplejson.loads,
+        )
+    if name == 'json':
+        return Codec(name, lambda obj: json.dumps(obj, separators=(',', ':')), json.loads)
+    raise ValueError('Unknown json codec {}'.format(name))
+
+
+def find_codec(names=CODECS):
+    '''
+    :param names: the json libraries to try, in order of preference
+
+    :rtype: :py:class:`Codec`
+    :return: the first library in ``names`` which is installed
+    '''
+    for name in names:
+        try:
+            return _load_codec(name)
+        except ImportError:
+            pass
+    raise ImportError('None of the json codecs {} are installed'.format(', '.join(names)))
+
+
+_codec = None
+
+
+def get_codec():
+    '''
+    :rtype: :py:class:`Codec`
+    :return: the codec new transports encode and decode with, by default the fastest \
+        installed library in :py:data:`CODECS`
+    '''
+    global _codec
+    if _codec is None:
+        _codec = find_codec()
+    return _codec
+
+
+def set_codec(codec):
+    '''
+    :param codec: a :py:class:`Codec` or the name of one of :py:data:`CODECS` for transports \
+        created from now on to use
+    '''
+    global _codec
+    if isinstance(codec, basestring):
+        codec = _load_codec(codec)
+    _codec = codec
+
+
+class OrderTemplate(object):
+    '''
+    A pre-encoded order for one account, venue, stock and order type.
+
+    The url path and the json for the fields which never change between orders are built \
+    once, so placing an order only has to format the price, quantity and direction into \
+    the body.
+
+    :param account: the trading account
+    :param venue: the venue the order is placed on
+    :param stock: the stock symbol
+    :param order_type: the order type, see :py:mod:`constants`
+    '''
+    __slots__ = ('path', '_prefix')
+
+    def __init__(self, account, venue, stock, order_type):
+        self.path = '/venues/{}/stocks/{}/orders'.format(venue, stock)
+        static = json.dumps({
+            'account': account,
+            'venue': venue,
+            'stock': stock,
+            'orderType': order_type,
+        }, separators=(',', ':'), sort_keys=True)
+        self._prefix = static[:-1] + ',"price":'
+
+    def encode(self, price, quantity, direction):
+        '''
+        :param price: the price in cents
+        :param quantity: the number of shares
+        :param direction: ``'buy'`` or ``'sell'``
+
+        :rtype: string
+        :return: the json body of the order
+        '''
+        encoded = _DIRECTIONS.get(direction)
+        if encoded is None:
+            encoded = json.dumps(direction)
+        return '%s%d,"qty":%d,"direction":%s}' % (self._prefix, price, quantity, encoded)
@@ -1,6 +1,9 @@
+import os
+
 # API Constants
-SF_API_BASE = 'https://api.stockfighter.io/ob/api'
+SF_API_BASE = os.getenv('SF_API_BASE', 'https://api.stockfighter.io/ob/api')
 SF_AUTH_HEADER_KEY = 'X-Starfighter-Authorization'
+SF_WS_BASE = 'wss://api.stockfighter.io/ob/api/ws'
 
 # Test values
 TEST_EXCHANGE = 'TESTEX'
@@ -12,3 +15,67 @@ MARKET_ORDER = 'market'  # buys stock at any price
 LIMIT_ORDER = 'limit'  # shares are bought for at most specified price (vice versa for sell)
 FILL_OR_KILL_ORDER = 'fill-or-kill'  # get exactly as many shares as you asked for or none
 IMMEDIATE_OR_CANCEL = 'immediate-or-cancel'  # like fok but you could get <= specified ammount
+
+# Transport
+DEFAULT_MAX_CONCURRENCY = 32  # requests kept in flight by the async client
+# persistent connections kept open per venue, one per request the async client keeps in flight
+DEFAULT_POOL_SIZE = DEFAULT_MAX_CONCURRENCY
+DEFAULT_TIMEOUT = None  # seconds to wait on the server, None waits forever
+
+# Streaming
+DEFAULT_STREAM_BUFFER = 1024  # messages held for a slow consumer
+DEFAULT_RECONNECT_DELAY = 0.1  # seconds before the first reconnect attempt
+MAX_RECONNECT_DELAY = 5.0  # reconnect backoff doubles up to this many seconds
+DROP_OLDEST = 'drop'  # a full buffer discards its oldest message
+BLOCK = 'block'  # a full buffer stops reading from the socket until there is room
+
+# Order tracking
+MIN_POLL_INTERVAL = 0.1  # seconds between refreshes while orders are filling
+MAX_POLL_INTERVAL = 2.0  # seconds between refreshes once nothing has changed for a while
+
+# Market data cache
+DEFAULT_QUOTE_TTL = 0.05  # seconds a cached quote is served before it is fetched again
+DEFAULT_ORDERBOOK_TTL = 0.05  # seconds a cached orderbook is served before it is fetched again
+DEFAULT_CACHE_SIZE = 256  # (endpoint, exchange, stock) entries kept before evicting the oldest
+
+# Rate limiting and retries
+DEFAULT_MAX_RETRIES = 3  # attempts after the first one for idempotent requests
+DEFAULT_RETRY_DELAY = 0.05  # seconds, doubled (with jitter) on every retry
+MAX_RETRY_DELAY = 1.0  # retry backoff never waits longer than this many seconds
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Health checks
+DEFAULT_HEARTBEAT_INTERVAL = 1.0  # seconds between heartbeats of a monitored venue
+DEFAULT_FAILURE_THRESHOLD = 5  # consecutive failed requests which open a venue's circuit
+DEFAULT_RESET_TIMEOUT = 2.0  # seconds an open circuit fails fast before letting a probe through
+DEFAULT_HALF_OPEN_PROBES = 1  # requests let through at once while a circuit is half open
+
+# Time series
+DEFAULT_SERIES_CAPACITY = 65536  # quotes kept per stock before the oldest are overwritten
+
+# Strategy runner
+DEFAULT_FEED_INTERVAL = 0.05  # seconds between market data refreshes of the feeder process
+DEFAULT_SHARED_CAPACITY = 4096  # quotes per stock kept in the shared memory ring
+
+# Orderbook history
+DEFAULT_KEYFRAME_INTERVAL = 128  # snapshots between full copies of the book in a delta log
+
+# Archive
+DEFAULT_SEGMENT_RECORDS = 1 << 20  # records per segment file before a new one is started
+DEFAULT_INDEX_INTERVAL = 1024  # records between timestamp index entries
+
+# Execution
+DEFAULT_EXECUTION_INTERVAL = 0.25  # seconds between passes of the execution scheduler
+DEFAULT_EXECUTION_RATE = 10  # requests per second the execution engine may send
+DEFAULT_TWAP_SLICES = 10  # child orders a TWAP parent is split into
+
+# Event bus
+DEFAULT_QUOTE_POLL_INTERVAL = 0.05  # seconds between quote polls of a watched stock
+DEFAULT_EVENT_WORKERS = 4  # threads running subscriber callbacks
+EVENT_BATCH = 64  # events a worker hands one subscriber before moving on to the next
+BBO = 'bbo'  # the best bid or ask price or size changed
+TRADE = 'trade'  # a new trade printed
+FILL = 'fill'  # one of our orders was filled
+
+# Clock sync
+DEFAULT_CLOCK_WINDOW = 64  # recent clock samples the offset and drift are estimated from
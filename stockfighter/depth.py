@@ -0,0 +1,107 @@
+from collections import namedtuple
+
+import numpy as np
+
+
+class BookArrays(namedtuple('BookArrays', ['bid_prices', 'bid_qtys', 'ask_prices', 'ask_qtys'])):
+    '''
+    An orderbook as four contiguous ``int64`` arrays, best level first on each side.
+    '''
+    __slots__ = ()
+
+
+def _side(levels):
+    levels = levels or []
+    count = len(levels)
+    prices = np.fromiter((level['price'] for level in levels), np.int64, count)
+    qtys = np.fromiter((level['qty'] for level in levels), np.int64, count)
+    return prices, qtys
+
+
+def book_arrays(book):
+    '''
+    :param book: an :py:class:`Orderbook`, a :py:class:`records.FastRecord` orderbook or the \
+        raw orderbook json
+
+    :rtype: :py:class:`BookArrays`
+    :return: the prices and quantities of both sides of the book
+
+    The arrays are filled straight from the raw json, without creating an object per level.
+    '''
+    raw = book if isinstance(book, dict) else book.json
+    return BookArrays(*(_side(raw.get('bids')) + _side(raw.get('asks'))))
+
+
+def cumulative_depth(qtys):
+    '''
+    :rtype: :py:class:`numpy.ndarray`
+    :return: the total quantity available at each level and every better one
+    '''
+    return np.cumsum(qtys)
+
+
+def _notional(prices, qtys, qty):
+    depth = np.cumsum(qtys)
+    if not len(depth) or depth[-1] < qty:
+        return None
+    last = np.searchsorted(depth, qty)
+    filled_before = depth[last - 1] if last else 0
+    return np.dot(prices[:last], qtys[:last]) + prices[last] * (qty - filled_before)
+
+
+def fill_price(prices, qtys, qty):
+    '''
+    :param prices: the prices of one side of the book, best first
+    :param qtys: the quantities at those prices
+    :param qty: the quantity to fill
+
+    :rtype: float
+    :return: the average price a market order for ``qty`` would fill at by sweeping the \
+        levels in order, or ``nan`` if the side does not hold ``qty`` or ``qty`` is not \
+        positive
+    '''
+    if qty <= 0:
+        return np.nan
+    notional = _notional(prices, qtys, qty)
+    return np.nan if notional is None else notional / float(qty)
+
+
+def impact_cost(book, qty, direction):
+    '''
+    :param book: a :py:class:`BookArrays` or anything :py:func:`book_arrays` accepts
+    :param qty: the quantity to trade
+    :param direction: either ``'buy'`` or ``'sell'``
+
+    :rtype: float
+    :return: how much worse, in cents in total, filling ``qty`` by sweeping the book is than \
+        filling it all at the best price; ``nan`` if the book is too thin
+    '''
+    if not isinstance(book, BookArrays):
+        book = book_arrays(book)
+
+    if direction == 'buy':
+        prices, qtys, sign = book.ask_prices, book.ask_qtys, 1
+    else:
+        prices, qtys, sign = book.bid_prices, book.bid_qtys, -1
+    notional = _notional(prices, qtys, qty)
+    if notional is None:
+        return np.nan
+    return float(sign * (notional - prices[0] * qty))
+
+
+def imbalance(book, levels=None):
+    '''
+    :param book: a :py:class:`BookArrays` or anything :py:func:`book_arrays` accepts
+    :param levels: only count this many levels on each side. If None, counts every level.
+
+    :rtype: float
+    :return: ``(bid quantity - ask quantity) / (bid quantity + ask quantity)``, between ``-1`` \
+        (only asks) and ``1`` (only bids), ``nan`` for an empty book
+    '''
+    if not isinstance(book, BookArrays):
+        book = book_arrays(book)
+
+    bids = book.bid_qtys[:levels].sum()
+    asks = book.ask_qtys[:levels].sum()
+    total = bids + asks
+    return (bids - asks) / float(total) if total else np.nan
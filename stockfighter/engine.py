@@ -0,0 +1,331 @@
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import datetime
+
+from constants import (
+    MARKET_ORDER,
+    LIMIT_ORDER,
+    FILL_OR_KILL_ORDER,
+    IMMEDIATE_OR_CANCEL,
+)
+
+ORDER_TYPES = (MARKET_ORDER, LIMIT_ORDER, FILL_OR_KILL_ORDER, IMMEDIATE_OR_CANCEL)
+
+
+def format_ts(seconds):
+    '''
+    :param seconds: a unix timestamp
+
+    :rtype: string
+    :return: the timestamp in the ISO-8601 format the stockfighter API uses
+    '''
+    return datetime.utcfromtimestamp(seconds).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class SimOrder(object):
+    '''
+    An order known to the matching engine. :py:meth:`to_json` renders it the way the \
+    stockfighter API does, so it can be loaded into an :py:class:`Order`.
+    '''
+    __slots__ = (
+        'id', 'account', 'venue', 'symbol', 'direction', 'type', 'price',
+        'original_qty', 'qty', 'total_filled', 'fills', 'ts', 'open',
+    )
+
+    def __init__(self, id_, account, venue, symbol, direction, type_, price, qty, ts):
+        self.id = id_
+        self.account = account
+        self.venue = venue
+        self.symbol = symbol
+        self.direction = direction
+        self.type = type_
+        self.price = price
+        self.original_qty = qty
+        self.qty = qty
+        self.total_filled = 0
+        self.fills = []
+        self.ts = ts
+        self.open = True
+
+    @property
+    def is_buy(self):
+        return self.direction == 'buy'
+
+    def fill(self, price, qty, ts):
+        self.qty -= qty
+        self.total_filled += qty
+        self.fills.append({'price': price, 'qty': qty, 'ts': ts})
+        if self.qty == 0:
+            self.open = False
+
+    def to_json(self):
+        return {
+            'ok': True,
+            'id': self.id,
+            'account': self.account,
+            'venue': self.venue,
+            'symbol': self.symbol,
+            'direction': self.direction,
+            'orderType': self.type,
+            'price': self.price,
+            'originalQty': self.original_qty,
+            'qty': self.qty,
+            'totalFilled': self.total_filled,
+            'fills': list(self.fills),
+            'ts': self.ts,
+            'open': self.open,
+        }
+
+
+class _Side(object):
+    '''
+    One side of a book: a FIFO queue of resting orders per price level and the level prices \
+    kept sorted best first, so the best level is always at index ``0``. Adding or dropping a \
+    level is a binary search plus an O(n) shift of the sorted list, which for the few dozen \
+    levels of a book is a short memmove; an order joining an existing level is O(1).
+    '''
+
+    def __init__(self, is_buy):
+        self.is_buy = is_buy
+        self.levels = {}
+        self.qty = {}
+        self._keys = []
+
+    def __nonzero__(self):
+        return bool(self._keys)
+
+    def prices(self):
+        return [self._price(key) for key in self._keys]
+
+    def best(self):
+        return self._price(self._keys[0]) if self._keys else None
+
+    def depth(self):
+        return sum(self.qty.itervalues())
+
+    def add(self, order):
+        level = self.levels.get(order.price)
+        if level is None:
+            level = self.levels[order.price] = deque()
+            self.qty[order.price] = 0
+            insort(self._keys, self._key(order.price))
+        level.append(order)
+        self.qty[order.price] += order.qty
+
+    def remove(self, order):
+        level = self.levels[order.price]
+        level.remove(order)
+        self.qty[order.price] -= order.qty
+        if not level:
+            self.drop(order.price)
+
+    def crosses(self, price, limit):
+        '''
+        :rtype: boolean
+        :return: ``True`` if an incoming order with limit price ``limit`` (``None`` for a \
+            market order) would trade against the level at ``price``
+        '''
+        if limit is None:
+            return True
+        return price >= limit if self.is_buy else price <= limit
+
+    def available(self, limit):
+        '''
+        :rtype: integer
+        :return: the quantity an incoming order with limit price ``limit`` could trade
+        '''
+        available = 0
+        for key in self._keys:
+            price = self._price(key)
+            if not self.crosses(price, limit):
+                break
+            available += self.qty[price]
+        return available
+
+    def drop(self, price):
+        del self.levels[price]
+        del self.qty[price]
+        self._keys.pop(bisect_left(self._keys, self._key(price)))
+
+    def _key(self, price):
+        return -price if self.is_buy else price
+
+    # negating is its own inverse
+    _price = _key
+
+
+class OrderBook(object):
+    '''
+    A price-time priority matching engine for a single stock.
+
+    Incoming orders trade against the best opposite level first and, within a level, against \
+    the order that has been resting longest. Trades happen at the resting order's price. Only \
+    limit orders rest on the book; the unfilled part of market and immediate-or-cancel orders \
+    is cancelled and fill-or-kill orders only trade if they can be filled completely.
+
+    :param venue: the venue the stock is traded on
+    :param symbol: the stock symbol
+    :param clock: a callable returning the current unix time, for deterministic timestamps
+    '''
+
+    def __init__(self, venue, symbol, clock=time.time):
+        self.venue = venue
+        self.symbol = symbol
+        self.clock = clock
+        self.bids = _Side(is_buy=True)
+        self.asks = _Side(is_buy=False)
+        self.last = None
+        self.last_size = None
+        self.last_trade = None
+
+    def submit(self, order):
+        '''
+        :param order: a new :py:class:`SimOrder` for this stock
+
+        Matches the order against the book and rests what is left of it if it is a limit order.
+        '''
+        if order.type not in ORDER_TYPES:
+            raise ValueError('Unknown order type {}'.format(order.type))
+
+        opposite = self.asks if order.is_buy else self.bids
+        limit = None if order.type == MARKET_ORDER else order.price
+
+        if order.type == FILL_OR_KILL_ORDER and opposite.available(limit) < order.qty:
+            order.qty = 0
+            order.open = False
+            return order
+
+        ts = order.ts
+        while order.qty and opposite:
+            price = opposite.best()
+            if not opposite.crosses(price, limit):
+                break
+
+            level = opposite.levels[price]
+            while level and order.qty:
+                resting = level[0]
+                qty = min(order.qty, resting.qty)
+                order.fill(price, qty, ts)
+                resting.fill(price, qty, ts)
+                opposite.qty[price] -= qty
+                if not resting.open:
+                    level.popleft()
+                self.last, self.last_size, self.last_trade = price, qty, ts
+            if not level:
+                opposite.drop(price)
+
+        if order.open and order.type == LIMIT_ORDER:
+            (self.bids if order.is_buy else self.asks).add(order)
+        elif order.open:
+            order.qty = 0
+            order.open = False
+        return order
+
+    def cancel(self, order):
+        '''
+        :param order: a :py:class:`SimOrder` previously submitted to this book
+
+        Takes the order off the book. Cancelling a closed order does nothing.
+        '''
+        if order.open:
+            (self.bids if order.is_buy else self.asks).remove(order)
+            order.qty = 0
+            order.open = False
+        return order
+
+    def orderbook_json(self):
+        ts = format_ts(self.clock())
+        return {
+            'ok': True,
+            'venue': self.venue,
+            'symbol': self.symbol,
+            'bids': self._levels_json(self.bids),
+            'asks': self._levels_json(self.asks),
+            'ts': ts,
+        }
+
+    def quote_json(self):
+        quote = {
+            'ok': True,
+            'venue': self.venue,
+            'symbol': self.symbol,
+            'bidDepth': self.bids.depth(),
+            'askDepth': self.asks.depth(),
+            'quoteTime': format_ts(self.clock()),
+        }
+        if self.bids:
+            quote['bid'] = self.bids.best()
+            quote['bidSize'] = self.bids.qty[quote['bid']]
+        if self.asks:
+            quote['ask'] = self.asks.best()
+            quote['askSize'] = self.asks.qty[quote['ask']]
+        if self.last is not None:
+            quote['last'] = self.last
+            quote['lastSize'] = self.last_size
+            quote['lastTrade'] = self.last_trade
+        return quote
+
+    def _levels_json(self, side):
+        return [
+            {'price': price, 'qty': side.qty[price], 'isBuy': side.is_buy}
+            for price in side.prices()
+        ]
+
+
+class Exchange(object):
+    '''
+    A venue made of one :py:class:`OrderBook` per stock, plus the order and account \
+    bookkeeping the stockfighter API exposes.
+
+    :param venue: the venue name
+    :param stocks: a dict of stock symbol to stock name
+    :param clock: a callable returning the current unix time
+    '''
+
+    def __init__(self, venue, stocks, clock=time.time):
+        self.venue = venue
+        self.stocks = stocks
+        self.clock = clock
+        self.books = dict(
+            (symbol, OrderBook(venue, symbol, clock=clock)) for symbol in stocks
+        )
+        self.orders = {}
+        self._accounts = {}
+
+    def place(self, account, symbol, direction, qty, price, type_):
+        '''
+        :rtype: :py:class:`SimOrder`
+        :return: the order after it has been matched against the book
+        '''
+        if direction not in ('buy', 'sell'):
+            raise ValueError('Unknown direction {}'.format(direction))
+        if int(qty) <= 0 or int(price) < 0:
+            raise ValueError('Quantity must be positive and price must not be negative')
+
+        order = SimOrder(
+            len(self.orders) + 1, account, self.venue, symbol, direction, type_,
+            int(price), int(qty), format_ts(self.clock()),
+        )
+        self.books[symbol].submit(order)
+        self.orders[order.id] = order
+        self._accounts.setdefault(account, []).append(order)
+        return order
+
+    def cancel(self, id_):
+        order = self.orders[id_]
+        return self.books[order.symbol].cancel(order)
+
+    def account_orders(self, account, symbol=None):
+        return [
+            order for order in self._accounts.get(account, [])
+            if symbol is None or order.symbol == symbol
+        ]
+
+    def stocks_json(self):
+        return {
+            'ok': True,
+            'symbols': [
+                {'symbol': symbol, 'name': name} for symbol, name in sorted(self.stocks.items())
+            ],
+        }
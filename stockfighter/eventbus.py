@@ -0,0 +1,285 @@
+import threading
+from collections import deque, namedtuple
+
+from concurrent.futures import ThreadPoolExecutor
+
+import api
+from constants import (
+    BBO,
+    DEFAULT_EVENT_WORKERS,
+    DEFAULT_QUOTE_POLL_INTERVAL,
+    DEFAULT_STREAM_BUFFER,
+    EVENT_BATCH,
+    FILL,
+    TRADE,
+)
+from tracker import OrderTracker
+
+
+class BBOChange(namedtuple('BBOChange', [
+    'venue', 'symbol', 'bid', 'ask', 'bidSize', 'askSize', 'quote',
+])):
+    '''
+    The best bid or ask of a stock changed in price or size. Prices are in cents and are \
+    ``None`` while the side is empty; ``quote`` is the quote the change was seen in.
+    '''
+    __slots__ = ()
+    kind = BBO
+
+
+class TradePrint(namedtuple('TradePrint', [
+    'venue', 'symbol', 'price', 'size', 'ts', 'quote',
+])):
+    '''
+    A new trade printed on a stock, as reported by the ``last``, ``lastSize`` and \
+    ``lastTrade`` fields of ``quote``.
+    '''
+    __slots__ = ()
+    kind = TRADE
+
+
+class FillEvent(namedtuple('FillEvent', ['venue', 'symbol', 'order', 'fills'])):
+    '''
+    A tracked order was filled: ``fills`` are its fills that are new since the last event.
+    '''
+    __slots__ = ()
+    kind = FILL
+
+
+class _Subscriber(object):
+    '''
+    A callback with its own bounded queue of events, drained by one pool thread at a time \
+    so that the callback sees its events in order and never runs concurrently with itself.
+    '''
+
+    def __init__(self, callback, kinds, venue, symbol, buffer_size):
+        self.callback = callback
+        self.kinds = kinds
+        self.venue = venue
+        self.symbol = symbol
+        self.events = deque(maxlen=buffer_size)
+        self.scheduled = False
+        self.dropped = 0
+
+    def wants(self, event):
+        return (
+            (self.kinds is None or event.kind in self.kinds) and
+            (self.venue is None or event.venue == self.venue) and
+            (self.symbol is None or event.symbol == self.symbol)
+        )
+
+
+class _Poller(object):
+
+    def __init__(self, bus, venue, stock, interval):
+        self.bus = bus
+        self.venue = venue
+        self.stock = stock
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.bus.publish_quote(
+                    self.bus.client.get_quote(exchange=self.venue, stock=self.stock)
+                )
+            except Exception as e:
+                self.bus.last_error = e
+            self.stopped.wait(self.interval)
+
+
+class EventBus(object):
+    '''
+    Turns quotes and order fills into typed events for any number of subscribers.
+
+    :py:meth:`watch` starts one poller per stock which feeds every quote to \
+    :py:meth:`publish_quote` (quotes from any other source, e.g. a \
+    :py:class:`stream.TickerTape`, can be published the same way). Each quote is compared \
+    with the last one seen for its stock: a quote no newer than it (seen before, or \
+    overtaken by a faster poll) is dropped outright, a change in the best bid or ask \
+    publishes a :py:class:`BBOChange` and a new last trade a :py:class:`TradePrint`, so \
+    subscribers only ever hear about actual changes, in time order. Orders \
+    passed to :py:meth:`track` are followed by an :py:class:`tracker.OrderTracker` which \
+    publishes a :py:class:`FillEvent` for every new fill.
+
+    Callbacks run on a pool of ``workers`` threads, never on the poller threads. Each \
+    subscriber gets its events in order, one at a time, from a queue of ``buffer_size`` \
+    events; when a subscriber falls that far behind its oldest events are dropped and \
+    counted in its ``dropped``. A worker runs at most :py:data:`EVENT_BATCH` events of one \
+    subscriber before queueing it behind the others, so busy subscribers share the pool \
+    rather than holding on to workers.
+
+    :param workers: the number of threads running callbacks
+    :param buffer_size: the events queued per subscriber
+    :param client: the :py:class:`client.Client` to poll and track orders with. If None or \
+        unspecified, the functions in :py:mod:`api` are used.
+    '''
+
+    def __init__(
+        self,
+        workers=DEFAULT_EVENT_WORKERS,
+        buffer_size=DEFAULT_STREAM_BUFFER,
+        client=None,
+    ):
+        self.client = client if client is not None else api
+        self.buffer_size = buffer_size
+        self.last_error = None
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._subscribers = []
+        self._pollers = {}
+        self._last_quote = {}
+        self._last_bbo = {}
+        self._last_trade = {}
+        self._tracker = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def subscribe(self, callback, kinds=None, venue=None, symbol=None):
+        '''
+        :param callback: called as ``callback(event)``
+        :param kinds: the event kinds to receive, any of :py:data:`BBO`, :py:data:`TRADE` \
+            and :py:data:`FILL`. If None or unspecified, every kind is received.
+        :param venue: only receive events for this venue
+        :param symbol: only receive events for this stock
+
+        :return: a handle for :py:meth:`unsubscribe`
+        '''
+        if isinstance(kinds, basestring):
+            kinds = (kinds,)
+        subscriber = _Subscriber(
+            callback, frozenset(kinds) if kinds is not None else None, venue, symbol,
+            self.buffer_size,
+        )
+        with self._lock:
+            self._subscribers = self._subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+
+    def watch(self, venue, stock, interval=DEFAULT_QUOTE_POLL_INTERVAL):
+        '''
+        Starts polling the stock's quote every ``interval`` seconds, unless it is already \
+        being polled.
+        '''
+        with self._lock:
+            if (venue, stock) in self._pollers:
+                return
+            poller = self._pollers[venue, stock] = _Poller(self, venue, stock, interval)
+        poller.thread.start()
+
+    def unwatch(self, venue, stock):
+        with self._lock:
+            poller = self._pollers.pop((venue, stock), None)
+        if poller is not None:
+            poller.stopped.set()
+            poller.thread.join()
+
+    def track(self, order):
+        '''
+        :param order: an :py:class:`Order` to publish fill events for until it is closed
+        '''
+        with self._lock:
+            if self._tracker is None:
+                self._tracker = OrderTracker(client=self.client)
+                self._tracker.on_fill(self._publish_fills)
+                self._tracker.start()
+        self._tracker.track(order)
+
+    def publish_quote(self, quote):
+        '''
+        :param quote: a :py:class:`Quote` or :py:class:`records.FastRecord` quote
+
+        Publishes the events the quote implies, if any.
+        '''
+        key = (quote.venue, quote.symbol)
+        quote_time = quote.quote_time_ns
+        bbo = (quote.bid, quote.ask, quote.bidSize, quote.askSize)
+        trade = (quote.lastTrade, quote.last, quote.lastSize)
+        events = []
+        with self._lock:
+            last = self._last_quote.get(key)
+            if last is not None and (quote_time is None or quote_time <= last):
+                return
+            self._last_quote[key] = quote_time
+            if self._last_bbo.get(key) != bbo:
+                self._last_bbo[key] = bbo
+                events.append(BBOChange(key[0], key[1], bbo[0], bbo[1], bbo[2], bbo[3], quote))
+            if trade[0] is not None and self._last_trade.get(key) != trade:
+                self._last_trade[key] = trade
+                events.append(TradePrint(key[0], key[1], trade[1], trade[2], trade[0], quote))
+        for event in events:
+            self.publish(event)
+
+    def publish(self, event):
+        '''
+        :param event: a :py:class:`BBOChange`, :py:class:`TradePrint`, \
+            :py:class:`FillEvent` or any object with ``kind``, ``venue`` and ``symbol``
+
+        Queues the event for every subscriber which wants it.
+        '''
+        for subscriber in self._subscribers:
+            if not subscriber.wants(event):
+                continue
+            with self._lock:
+                if len(subscriber.events) == subscriber.events.maxlen:
+                    subscriber.dropped += 1
+                subscriber.events.append(event)
+                if subscriber.scheduled:
+                    continue
+                subscriber.scheduled = True
+            self._executor.submit(self._drain, subscriber)
+
+    def close(self):
+        '''
+        Stops every poller and the order tracker and waits for queued callbacks to run.
+        '''
+        with self._lock:
+            pollers, self._pollers = self._pollers.values(), {}
+            tracker, self._tracker = self._tracker, None
+        for poller in pollers:
+            poller.stopped.set()
+        for poller in pollers:
+            poller.thread.join()
+        if tracker is not None:
+            tracker.stop()
+        self._executor.shutdown(wait=True)
+
+    def _publish_fills(self, order, fills):
+        self.publish(FillEvent(order.venue, order.symbol, order, fills))
+
+    def _drain(self, subscriber):
+        while self._run_batch(subscriber):
+            # still scheduled, so nothing else submits it in the meantime and order is kept
+            try:
+                self._executor.submit(self._drain, subscriber)
+                return
+            except RuntimeError:
+                # the bus is closing and takes no new work, so finish the queue here
+                continue
+
+    def _run_batch(self, subscriber):
+        '''
+        :rtype: boolean
+        :return: ``True`` if the subscriber has events left after this batch
+        '''
+        for _ in xrange(EVENT_BATCH):
+            with self._lock:
+                if not subscriber.events:
+                    subscriber.scheduled = False
+                    return False
+                event = subscriber.events.popleft()
+            try:
+                subscriber.callback(event)
+            except Exception as e:
+                self.last_error = e
+        return True
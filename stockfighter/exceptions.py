@@ -37,3 +37,17 @@ class SyntaxError_(Exception):
             ' ' * len(''.join(self.tokens[:self.idx])) +
             '^' + ' ' * len(''.join(self.tokens[self.idx:]))
         )
+
+
+class ReplayMismatch(Exception):
+    def __init__(self, type_, path, expected=None):
+        self.type_ = type_
+        self.path = path
+        self.expected = expected
+
+    def __str__(self):
+        if self.expected is None:
+            return 'no recorded response for {} {}'.format(self.type_.upper(), self.path)
+        return 'expected {} {} but got {} {}'.format(
+            self.expected['type'].upper(), self.expected['path'], self.type_.upper(), self.path,
+        )
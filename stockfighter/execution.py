@@ -0,0 +1,377 @@
+import threading
+import time
+from collections import defaultdict
+
+import api
+from constants import (
+    DEFAULT_EXECUTION_INTERVAL,
+    DEFAULT_EXECUTION_RATE,
+    DEFAULT_TWAP_SLICES,
+    IMMEDIATE_OR_CANCEL,
+    LIMIT_ORDER,
+    TEST_EXCHANGE,
+    TEST_STOCK,
+)
+from instrumentation import Histogram
+from ratelimit import TokenBucket
+
+
+def _capped(price, limit, direction):
+    if limit is None:
+        return price
+    return min(price, limit) if direction == 'buy' else max(price, limit)
+
+
+class TWAP(object):
+    '''
+    Splits the parent order into ``slices`` equal child orders spread evenly over \
+    ``duration`` seconds. Each slice is sent as an immediate-or-cancel order at the far touch \
+    (the ask for a buy), capped at the parent's limit, and whatever a slice does not fill is \
+    added to the next one. Once ``duration`` is up, the rest is sent on every pass until the \
+    parent is done.
+
+    :param duration: the seconds the parent order is worked over
+    :param slices: the number of child orders
+    '''
+
+    def __init__(self, duration, slices=DEFAULT_TWAP_SLICES):
+        self.duration = duration
+        self.slices = slices
+        self.sent = 0
+        self.start = None
+
+    def children(self, parent, quote, now):
+        if self.start is None:
+            self.start = now
+        due = min(self.slices, int((now - self.start) * self.slices / self.duration) + 1)
+        if due <= self.sent and now - self.start < self.duration:
+            return []
+
+        touch = quote.ask if parent.direction == 'buy' else quote.bid
+        if touch is None:
+            touch = parent.limit
+        if touch is None:
+            return []
+
+        # a late pass catches up on every slice that came due since the last one
+        available = parent.remaining - parent.outstanding
+        slices_left = self.slices - self.sent
+        if slices_left > 0:
+            qty = -(-available * (due - self.sent) // slices_left)
+        else:
+            qty = available
+        self.sent = due
+        return [(qty, _capped(touch, parent.limit, parent.direction), IMMEDIATE_OR_CANCEL)]
+
+    def stale(self, parent, child, quote, now):
+        return False
+
+
+class Iceberg(object):
+    '''
+    Shows at most ``clip`` shares of the parent order at a time, resting at the parent's \
+    limit price, and sends the next clip once the visible one has filled.
+
+    :param clip: the largest quantity shown at once
+    '''
+
+    def __init__(self, clip):
+        self.clip = clip
+
+    def children(self, parent, quote, now):
+        if parent.outstanding or parent.limit is None:
+            return []
+        return [(self.clip, parent.limit, LIMIT_ORDER)]
+
+    def stale(self, parent, child, quote, now):
+        return False
+
+
+class Peg(object):
+    '''
+    Rests one child order at the near touch (the bid for a buy), ``offset`` cents inside \
+    the spread and capped at the parent's limit, and moves it whenever the touch moves more \
+    than ``tolerance`` cents away from it. While the order is the touch itself it stays \
+    where it is, so it does not chase its own price.
+
+    :param clip: the largest quantity resting at once. If None or unspecified, the whole \
+        parent order rests at once.
+    :param offset: cents to improve on the touch by
+    :param tolerance: cents the touch may move before the order is moved after it
+    '''
+
+    def __init__(self, clip=None, offset=0, tolerance=0):
+        self.clip = clip
+        self.offset = offset
+        self.tolerance = tolerance
+
+    def target(self, parent, quote):
+        '''
+        :rtype: integer
+        :return: the price in cents the child order should rest at, ``None`` if there is \
+            neither a touch nor a limit to peg to
+        '''
+        if parent.direction == 'buy':
+            touch = quote.bid + self.offset if quote.bid is not None else None
+        else:
+            touch = quote.ask - self.offset if quote.ask is not None else None
+        if touch is None:
+            return parent.limit
+        return _capped(touch, parent.limit, parent.direction)
+
+    def children(self, parent, quote, now):
+        if parent.outstanding:
+            return []
+        price = self.target(parent, quote)
+        if price is None:
+            return []
+        return [(self.clip or parent.remaining, price, LIMIT_ORDER)]
+
+    def stale(self, parent, child, quote, now):
+        touch = quote.bid if parent.direction == 'buy' else quote.ask
+        if touch == child.price:
+            return False
+        price = self.target(parent, quote)
+        return price is not None and abs(child.price - price) > self.tolerance
+
+
+class ParentOrder(object):
+    '''
+    A large order worked through child orders by an :py:class:`ExecutionEngine`.
+
+    ``filled``, ``outstanding`` (shares resting in open child orders) and ``notional`` (the \
+    total filled value in cents) are updated by the engine on every pass.
+
+    :param direction: either ``'buy'`` or ``'sell'``
+    :param quantity: the total number of shares
+    :param strategy: a :py:class:`TWAP`, :py:class:`Iceberg` or :py:class:`Peg` (or any object \
+        with the same ``children`` and ``stale`` methods), used for this order only
+    :param exchange: the exchange. Defaults to :py:data:`TEST_EXCHANGE`.
+    :param stock: the stock. Defaults to :py:data:`TEST_STOCK`.
+    :param limit: the worst price to trade at. If None or unspecified, any price is taken. \
+        :py:class:`Iceberg` needs one.
+    '''
+
+    def __init__(
+        self,
+        direction,
+        quantity,
+        strategy,
+        exchange=TEST_EXCHANGE,
+        stock=TEST_STOCK,
+        limit=None,
+    ):
+        self.direction = direction
+        self.quantity = quantity
+        self.strategy = strategy
+        self.exchange = exchange
+        self.stock = stock
+        # cents, as in quotes
+        self.limit = int(round(limit * 100)) if limit is not None else None
+        self.children = {}
+        self.filled = 0
+        self.outstanding = 0
+        self.notional = 0
+        self.cancelled = False
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def remaining(self):
+        return self.quantity - self.filled
+
+    @property
+    def average_price(self):
+        '''
+        The average fill price in cents, ``None`` before the first fill.
+        '''
+        return self.notional / float(self.filled) if self.filled else None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def open_children(self):
+        return [child for child in self.children.values() if child.open]
+
+    def cancel(self):
+        '''
+        Stops sending child orders. The open ones are cancelled on the engine's next pass.
+        '''
+        self.cancelled = True
+
+    def wait(self, timeout=None):
+        '''
+        :rtype: boolean
+        :return: ``True`` once the order is filled or cancelled, ``False`` if ``timeout`` \
+            seconds passed first
+        '''
+        return self._done.wait(timeout)
+
+    def update(self, child):
+        '''
+        :param child: the latest state of one of the child orders
+        '''
+        self.children[child.id] = child
+        filled = outstanding = notional = 0
+        for order in self.children.values():
+            filled += order.totalFilled or 0
+            if order.open:
+                outstanding += order.qty or 0
+            for fill in order.fills or []:
+                notional += fill.price * fill.qty
+        self.filled, self.outstanding, self.notional = filled, outstanding, notional
+
+
+class ExecutionEngine(object):
+    '''
+    Works parent orders through child orders from a single scheduler loop.
+
+    Every pass refreshes the open child orders of each parent, fetches one quote per stock, \
+    cancels the children the parent's strategy considers stale and places the new ones it \
+    asks for. New children are cut down so that filled, resting and new quantity together \
+    never exceed the parent's size, and every request waits on a :py:class:`TokenBucket` of \
+    ``rate`` requests per second, so the engine as a whole never exceeds that budget \
+    however many parents it is working. In the background, a pass starts every \
+    ``interval`` seconds of wall-clock time, or straight after the previous one if that took \
+    longer. The latency of every request is recorded in ``latency``, a \
+    :py:class:`instrumentation.Histogram` per request kind (``'quote'``, ``'status'``, \
+    ``'order'`` and ``'cancel'``), for monitoring only; it plays no part in scheduling.
+
+    :param rate: requests per second
+    :param burst: the burst of requests allowed. Defaults to ``rate``.
+    :param interval: the seconds between passes when run in the background
+    :param client: the :py:class:`client.Client` to trade with. If None or unspecified, the \
+        functions in :py:mod:`api` are used.
+    '''
+
+    def __init__(
+        self,
+        rate=DEFAULT_EXECUTION_RATE,
+        burst=None,
+        interval=DEFAULT_EXECUTION_INTERVAL,
+        client=None,
+    ):
+        self.client = client if client is not None else api
+        self.budget = TokenBucket(rate, burst)
+        self.interval = interval
+        self.latency = defaultdict(Histogram)
+        self.last_error = None
+        self._parents = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._parents)
+
+    def submit(self, parent):
+        '''
+        :param parent: a :py:class:`ParentOrder` to start working on the next pass
+
+        :rtype: :py:class:`ParentOrder`
+        :return: ``parent``
+        '''
+        with self._lock:
+            self._parents.append(parent)
+        return parent
+
+    def step(self, now=None):
+        '''
+        Makes one pass over every parent order which is not done yet.
+        '''
+        with self._lock:
+            parents = list(self._parents)
+
+        quotes = {}
+        for parent in parents:
+            try:
+                self._work(parent, quotes, now)
+            except Exception as e:
+                parent.error = self.last_error = e
+
+    def start(self):
+        '''
+        Runs the scheduler in a background thread until :py:meth:`stop` is called.
+        '''
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            started = time.time()
+            self.step()
+            self._stopped.wait(max(self.interval - (time.time() - started), 0))
+
+    def _work(self, parent, quotes, now):
+        for child in parent.open_children():
+            parent.update(self._request(
+                'status', self.client.order_status, child.id,
+                exchange=parent.exchange, stock=parent.stock,
+            ))
+
+        if parent.cancelled or parent.remaining <= 0:
+            for child in parent.open_children():
+                self._cancel(parent, child)
+            if not parent.open_children():
+                self._finish(parent)
+            return
+
+        key = (parent.exchange, parent.stock)
+        quote = quotes.get(key)
+        if quote is None:
+            quote = quotes[key] = self._request(
+                'quote', self.client.get_quote, exchange=parent.exchange, stock=parent.stock,
+            )
+
+        now = now if now is not None else time.time()
+        for child in parent.open_children():
+            if parent.strategy.stale(parent, child, quote, now):
+                self._cancel(parent, child)
+
+        for qty, price, order_type in parent.strategy.children(parent, quote, now):
+            qty = min(qty, parent.remaining - parent.outstanding)
+            if qty <= 0:
+                break
+            parent.update(self._request(
+                'order', self.client.trade_stock, qty, parent.direction,
+                exchange=parent.exchange, stock=parent.stock, price=price / 100.0,
+                order_type=order_type,
+            ))
+
+        if parent.remaining <= 0 and not parent.open_children():
+            self._finish(parent)
+
+    def _cancel(self, parent, child):
+        parent.update(self._request(
+            'cancel', self.client.delete_order, child.id,
+            exchange=parent.exchange, stock=parent.stock,
+        ))
+
+    def _finish(self, parent):
+        with self._lock:
+            if parent in self._parents:
+                self._parents.remove(parent)
+        parent._done.set()
+
+    def _request(self, kind, fn, *args, **kwargs):
+        delay = self.budget.wait_time(time.time())
+        while delay:
+            time.sleep(delay)
+            delay = self.budget.wait_time(time.time())
+        self.budget.take()
+
+        start = time.time()
+        result = fn(*args, **kwargs)
+        self.latency[kind].record(time.time() - start)
+        return result
@@ -0,0 +1,236 @@
+import threading
+import time
+
+import api
+from constants import (
+    DEFAULT_FAILURE_THRESHOLD,
+    DEFAULT_HALF_OPEN_PROBES,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_RESET_TIMEOUT,
+)
+from exceptions import HealthcheckFailed
+
+CLOSED = 'closed'  # requests are sent
+OPEN = 'open'  # requests fail fast
+HALF_OPEN = 'half-open'  # a few probe requests are sent to find out if the venue is back
+
+
+class _Circuit(object):
+    __slots__ = ('state', 'failures', 'opened', 'probes', 'probed')
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.probes = 0
+        self.probed = 0
+
+
+class CircuitBreaker(object):
+    '''
+    Stops requests to venues which are known to be down.
+
+    Every venue has a circuit which starts out closed. ``failure_threshold`` consecutive \
+    failures (connection errors, timeouts or 5xx responses), or a failed heartbeat from a \
+    :py:class:`HeartbeatMonitor`, open it. While it is open every request to the venue \
+    raises :py:exception:`HealthcheckFailed` straight away instead of waiting on the network. \
+    After ``reset_timeout`` seconds, or as soon as a heartbeat succeeds, the circuit is half \
+    open: up to ``half_open_probes`` requests are let through at a time and the first one to \
+    succeed closes the circuit again, while a failure opens it for another ``reset_timeout``.
+
+    Pass it to :py:class:`transport.Transport` as ``circuit_breaker``.
+
+    :param failure_threshold: consecutive failures which open a circuit
+    :param reset_timeout: seconds an open circuit fails fast for
+    :param half_open_probes: requests let through at once while a circuit is half open
+    '''
+
+    def __init__(
+        self,
+        failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout=DEFAULT_RESET_TIMEOUT,
+        half_open_probes=DEFAULT_HALF_OPEN_PROBES,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def state(self, venue):
+        '''
+        :param venue: the venue, ``None`` for venue independent requests
+
+        :rtype: string
+        :return: one of :py:data:`CLOSED`, :py:data:`OPEN` or :py:data:`HALF_OPEN`
+        '''
+        circuit = self._circuits.get(venue)
+        return circuit.state if circuit is not None else CLOSED
+
+    def allow(self, venue):
+        '''
+        :param venue: the venue a request is about to be sent to
+
+        Returns if the request may be sent and raises :py:exception:`HealthcheckFailed` if \
+        it should fail fast.
+        '''
+        circuit = self._circuits.get(venue)
+        if circuit is None or circuit.state == CLOSED:
+            return
+
+        with self._lock:
+            now = time.time()
+            if circuit.state == OPEN:
+                if now - circuit.opened < self.reset_timeout:
+                    raise self._failed(venue)
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+            if circuit.state == HALF_OPEN:
+                # a probe which never reported back stops counting after reset_timeout
+                if circuit.probes >= self.half_open_probes:
+                    if now - circuit.probed < self.reset_timeout:
+                        raise self._failed(venue)
+                    circuit.probes = 0
+                circuit.probes += 1
+                circuit.probed = now
+
+    def record(self, venue, status_code):
+        '''
+        :param venue: the venue a request was sent to
+        :param status_code: the http status code of the response
+
+        Counts 5xx responses as failures and anything else as a success.
+        '''
+        if status_code >= 500:
+            self.record_failure(venue)
+        else:
+            self.record_success(venue)
+
+    def record_success(self, venue):
+        circuit = self._circuits.get(venue)
+        if circuit is None or (circuit.state == CLOSED and not circuit.failures):
+            return
+        with self._lock:
+            circuit.state = CLOSED
+            circuit.failures = 0
+            circuit.probes = 0
+
+    def record_failure(self, venue):
+        with self._lock:
+            circuit = self._circuit(venue)
+            circuit.failures += 1
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                self._open(circuit)
+
+    def trip(self, venue):
+        '''
+        Opens the venue's circuit now, e.g. because its heartbeat failed.
+        '''
+        with self._lock:
+            self._open(self._circuit(venue))
+
+    def half_open(self, venue):
+        '''
+        Lets probes through to the venue now if its circuit is open, e.g. because its \
+        heartbeat succeeded again.
+        '''
+        with self._lock:
+            circuit = self._circuits.get(venue)
+            if circuit is not None and circuit.state == OPEN:
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+
+    def reset(self, venue=None):
+        '''
+        Closes the venue's circuit, or every circuit if ``venue`` is None.
+        '''
+        with self._lock:
+            if venue is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(venue, None)
+
+    def _circuit(self, venue):
+        circuit = self._circuits.get(venue)
+        if circuit is None:
+            circuit = self._circuits[venue] = _Circuit()
+        return circuit
+
+    def _open(self, circuit):
+        circuit.state = OPEN
+        circuit.opened = time.time()
+        circuit.probes = 0
+
+    def _failed(self, venue):
+        return HealthcheckFailed(None, {
+            'ok': False,
+            'venue': venue,
+            'error': 'circuit open, {} is down'.format(venue or 'the api'),
+        })
+
+
+class HeartbeatMonitor(object):
+    '''
+    Checks a venue's heartbeat in the background and keeps a :py:class:`CircuitBreaker` \
+    up to date with the result, so requests to a venue that goes down start failing fast \
+    without having to time out first and are let through again once it is back.
+
+    The transport the client sends the heartbeats through should have a ``timeout`` set, or \
+    a hung venue will hold the monitor up as well.
+
+    :param venue: the venue to monitor, ``None`` for the overall stockfighter api
+    :param circuit_breaker: the :py:class:`CircuitBreaker` to update
+    :param interval: seconds between heartbeats
+    :param client: the :py:class:`client.Client` to send heartbeats with. If None or \
+        unspecified, :py:func:`api.healthcheck` is used.
+    '''
+
+    def __init__(self, venue, circuit_breaker, interval=DEFAULT_HEARTBEAT_INTERVAL, client=None):
+        self.venue = venue
+        self.circuit_breaker = circuit_breaker
+        self.interval = interval
+        self.client = client if client is not None else api
+        self.healthy = None
+        self.last_error = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def check(self):
+        '''
+        :rtype: boolean
+        :return: ``True`` if the heartbeat succeeded
+
+        Sends one heartbeat and opens or half opens the venue's circuit accordingly.
+        '''
+        try:
+            self.client.healthcheck(venue=self.venue)
+        except Exception as e:
+            self.last_error = e
+            self.healthy = False
+            self.circuit_breaker.trip(self.venue)
+        else:
+            self.healthy = True
+            self.circuit_breaker.half_open(self.venue)
+        return self.healthy
+
+    def start(self):
+        '''
+        Sends heartbeats in a background thread until :py:meth:`stop` is called.
+        '''
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.check()
+            self._stopped.wait(self.interval)
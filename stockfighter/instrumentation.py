@@ -0,0 +1,167 @@
+import threading
+from collections import defaultdict
+
+PHASES = ('wait', 'transfer', 'decode', 'validate', 'total')
+
+
+class Histogram(object):
+    '''
+    A log-linear latency histogram in the style of HdrHistogram.
+
+    Values are recorded in whole microseconds. Values below ``2 ** sub_bucket_bits`` get a \
+    bucket each; above that, every power of two is split into ``2 ** (sub_bucket_bits - 1)`` \
+    buckets, so every recorded value is reported within a relative error of \
+    ``2 ** (1 - sub_bucket_bits)`` (under 1% by default) whatever its magnitude, in a \
+    fixed, small amount of memory.
+
+    :param sub_bucket_bits: the precision of the histogram
+    '''
+
+    def __init__(self, sub_bucket_bits=8):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub_buckets = 1 << sub_bucket_bits
+        self._half = self._sub_buckets >> 1
+        self.counts = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        '''
+        :param seconds: the latency to record
+        '''
+        value = int(seconds * 1e6)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, percentile):
+        '''
+        :param percentile: a number between ``0`` and ``100``
+
+        :rtype: integer
+        :return: the latency in microseconds below which ``percentile`` percent of the \
+            recorded values fall
+        '''
+        if not self.count:
+            return None
+        target = max(1, int(round(self.count * percentile / 100.0)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest(index), self.max)
+        return self.max
+
+    def snapshot(self):
+        '''
+        :rtype: dictionary
+        :return: the count, min, max and mean plus the usual percentiles, in microseconds
+        '''
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total / float(self.count) if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+        }
+
+    def _index(self, value):
+        if value < self._sub_buckets:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self._sub_buckets + (shift - 1) * self._half + (value >> shift) - self._half
+
+    def _highest(self, index):
+        if index < self._sub_buckets:
+            return index
+        shift, sub = divmod(index - self._sub_buckets, self._half)
+        shift += 1
+        return ((sub + self._half + 1) << shift) - 1
+
+
+class Instrumentation(object):
+    '''
+    Collects per endpoint latency histograms and counters for a :py:class:`transport.Transport`.
+
+    Every request is timed in phases: ``'wait'`` from sending the request until the response \
+    headers arrive (including opening a connection when none is pooled), ``'transfer'`` for \
+    reading the body, ``'decode'`` for parsing the json and ``'validate'`` for loading it into \
+    a schematics object. ``'total'`` covers the transport's part of the call, from sending \
+    the request to decoding the response, and excludes ``'validate'``, which the client does \
+    once the transport has returned; a whole call takes ``'total'`` plus ``'validate'``. \
+    Status codes and exceptions are counted per endpoint (see \
+    :py:func:`transport.endpoint_of`).
+
+    Hooks registered with :py:meth:`add_pre_hook` are called as \
+    ``hook(endpoint, type_, path, data)`` before every request and hooks registered with \
+    :py:meth:`add_post_hook` as ``hook(endpoint, type_, path, status_code, json, error)`` \
+    after it; ``error`` is the exception raised, if any, and ``data`` is the encoded json \
+    body, if any.
+    '''
+
+    def __init__(self):
+        self.histograms = defaultdict(Histogram)
+        self.status_codes = defaultdict(int)
+        self.exceptions = defaultdict(int)
+        self._pre_hooks = []
+        self._post_hooks = []
+        self._lock = threading.Lock()
+
+    def add_pre_hook(self, hook):
+        self._pre_hooks.append(hook)
+
+    def add_post_hook(self, hook):
+        self._post_hooks.append(hook)
+
+    def before(self, endpoint, type_, path, data):
+        for hook in self._pre_hooks:
+            hook(endpoint, type_, path, data)
+
+    def after(self, endpoint, type_, path, status_code=None, json=None, error=None):
+        with self._lock:
+            if error is not None:
+                self.exceptions[endpoint, type(error).__name__] += 1
+            else:
+                self.status_codes[endpoint, status_code] += 1
+        for hook in self._post_hooks:
+            hook(endpoint, type_, path, status_code, json, error)
+
+    def record(self, endpoint, phase, seconds):
+        with self._lock:
+            self.histograms[endpoint, phase].record(seconds)
+
+    def count_exception(self, endpoint, error):
+        with self._lock:
+            self.exceptions[endpoint, type(error).__name__] += 1
+
+    def snapshot(self):
+        '''
+        :rtype: dictionary
+        :return: a json serializable copy of everything recorded so far, of the form \
+            ``{endpoint: {'latency': {phase: histogram snapshot}, 'status_codes': {...}, \
+            'exceptions': {...}}}``
+        '''
+        with self._lock:
+            snapshot = defaultdict(lambda: {'latency': {}, 'status_codes': {}, 'exceptions': {}})
+            for (endpoint, phase), histogram in self.histograms.items():
+                snapshot[endpoint]['latency'][phase] = histogram.snapshot()
+            for (endpoint, status_code), count in self.status_codes.items():
+                snapshot[endpoint]['status_codes'][str(status_code)] = count
+            for (endpoint, name), count in self.exceptions.items():
+                snapshot[endpoint]['exceptions'][name] = count
+            return dict(snapshot)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.status_codes.clear()
+            self.exceptions.clear()
@@ -0,0 +1,173 @@
+import threading
+
+
+class Position(object):
+    '''
+    The position in one stock, kept up to date one fill at a time. Prices and money are in \
+    cents, like everywhere else in the API.
+
+    ``qty`` is positive when long and negative when short, ``cash`` is the cash the trades \
+    have brought in (negative after buying) and ``cost`` is what the open position cost, \
+    so ``avg_cost`` is the average price it was opened at. ``realized`` is the profit \
+    locked in by trades that reduced the position.
+    '''
+    __slots__ = ('qty', 'cash', 'cost', 'realized', 'mark', 'fills')
+
+    def __init__(self):
+        self.qty = 0
+        self.cash = 0
+        self.cost = 0
+        self.realized = 0
+        self.mark = None
+        self.fills = 0
+
+    @property
+    def avg_cost(self):
+        return self.cost / float(self.qty) if self.qty else None
+
+    @property
+    def unrealized(self):
+        '''
+        The profit of the open position at the last mark, ``0`` if it has never been marked.
+        '''
+        if self.mark is None or not self.qty:
+            return 0
+        return self.qty * self.mark - self.cost
+
+    @property
+    def pnl(self):
+        return self.realized + self.unrealized
+
+    def apply(self, direction, price, qty):
+        '''
+        :param direction: either ``'buy'`` or ``'sell'``
+        :param price: the fill price
+        :param qty: the filled quantity
+        '''
+        signed = qty if direction == 'buy' else -qty
+        self.cash -= signed * price
+        self.fills += 1
+
+        if self.qty == 0 or (self.qty > 0) == (signed > 0):
+            self.qty += signed
+            self.cost += signed * price
+            return
+
+        closed = min(abs(signed), abs(self.qty))
+        if self.qty < 0:
+            closed = -closed
+        avg_cost = self.cost / float(self.qty)
+        self.realized += closed * (price - avg_cost)
+        self.cost -= closed * avg_cost
+        self.qty -= closed
+        signed += closed
+        if signed:
+            self.qty = signed
+            self.cost = signed * price
+        elif not self.qty:
+            self.cost = 0
+
+
+class PositionBook(object):
+    '''
+    Positions, cash and profit per ``(venue, symbol)``, fed incrementally by order updates.
+
+    Every :py:class:`Order` passed to :py:meth:`apply_order` (e.g. from \
+    :py:func:`api.all_orders`, an :py:class:`tracker.OrderTracker` or the \
+    :py:class:`stream.Executions` feed) only has the fills not seen before applied, \
+    identified by venue, order id and fill index, so the same order can be fed any number \
+    of times and each update costs O(1) per new fill instead of re-summing every fill of \
+    the day.
+    '''
+
+    def __init__(self):
+        self.positions = {}
+        self._applied = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        return self.positions[key]
+
+    def position(self, venue, symbol):
+        '''
+        :rtype: :py:class:`Position`
+        :return: the position in the stock, created empty on first use
+        '''
+        key = (venue, symbol)
+        position = self.positions.get(key)
+        if position is None:
+            position = self.positions[key] = Position()
+        return position
+
+    def apply_order(self, order):
+        '''
+        :param order: an :py:class:`Order` or :py:class:`records.FastRecord` order
+
+        :rtype: integer
+        :return: the number of new fills applied
+        '''
+        fills = order.fills or []
+        # order ids are only unique per venue
+        key = (order.venue, order.id)
+        with self._lock:
+            applied = self._applied.get(key, 0)
+            if len(fills) <= applied:
+                return 0
+            position = self.position(order.venue, order.symbol)
+            for fill in fills[applied:]:
+                position.apply(order.direction, fill.price, fill.qty)
+            self._applied[key] = len(fills)
+        return len(fills) - applied
+
+    def apply_fill(self, venue, symbol, direction, price, qty, order_id=None, index=None):
+        '''
+        :param order_id: the id of the order on ``venue`` the fill belongs to
+        :param index: the position of the fill in the order's fills
+
+        :rtype: boolean
+        :return: ``False`` if the fill was applied before
+
+        Applies a single fill. Fills given with an order id and index are only applied once \
+        and only after every earlier fill of the order. Raises ``ValueError`` if only one of \
+        the two is given.
+        '''
+        if (order_id is None) != (index is None):
+            raise ValueError('order_id and index must be given together')
+        with self._lock:
+            if order_id is not None:
+                key = (venue, order_id)
+                if index != self._applied.get(key, 0):
+                    return False
+                self._applied[key] = index + 1
+            self.position(venue, symbol).apply(direction, price, qty)
+        return True
+
+    def mark(self, quote):
+        '''
+        :param quote: a :py:class:`Quote` for a stock
+
+        Marks the stock's position to the middle of the quote's bid and ask, or to the last \
+        trade price if one side of the book is empty.
+        '''
+        if quote.bid is not None and quote.ask is not None:
+            mark = (quote.bid + quote.ask) / 2.0
+        else:
+            mark = quote.last
+        if mark is not None:
+            self.position(quote.venue, quote.symbol).mark = mark
+
+    @property
+    def cash(self):
+        return sum(position.cash for position in self.positions.values())
+
+    @property
+    def realized(self):
+        return sum(position.realized for position in self.positions.values())
+
+    @property
+    def unrealized(self):
+        return sum(position.unrealized for position in self.positions.values())
+
+    @property
+    def pnl(self):
+        return self.realized + self.unrealized
@@ -0,0 +1,182 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from constants import (
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RETRY_DELAY,
+    MAX_RETRY_DELAY,
+    RETRY_STATUS_CODES,
+)
+
+# Lower numbers are sent first when requests are waiting on the same venue
+PRIORITIES = {
+    'cancel': 0,
+    'order': 1,
+    'status': 2,
+    'orders': 2,
+}
+DEFAULT_PRIORITY = 3
+
+
+class TokenBucket(object):
+    '''
+    Allows ``rate`` events per second on average with bursts of up to ``burst`` events.
+
+    :param rate: tokens added per second
+    :param burst: the maximum number of tokens the bucket holds. Defaults to ``rate``.
+    '''
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.tokens = self.burst
+        self.updated = time.time()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        '''
+        :rtype: float
+        :return: seconds until a token is available, ``0`` if one is available now
+        '''
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class RateLimiter(object):
+    '''
+    Holds requests back so they stay within per venue and per endpoint budgets.
+
+    Each venue gets a :py:class:`TokenBucket` of ``venue_rate`` requests per second and each \
+    endpoint (see :py:func:`transport.endpoint_of`) on each venue gets a bucket of its own if \
+    it has an entry in ``endpoint_rates``. A request is sent once every bucket it belongs to \
+    has a token. When several requests are waiting on the same venue, the ones with the \
+    lowest :py:data:`PRIORITIES` go first, so cancels jump ahead of orders and orders jump \
+    ahead of quote polling.
+
+    :param venue_rate: requests per second allowed on each venue. If None or unspecified, \
+        venues are not limited.
+    :param venue_burst: the burst allowed on each venue. Defaults to ``venue_rate``.
+    :param endpoint_rates: a dict of endpoint name to requests per second or to a \
+        ``(rate, burst)`` tuple
+    :param priorities: a dict of endpoint name to priority, overriding :py:data:`PRIORITIES`
+    '''
+
+    def __init__(self, venue_rate=None, venue_burst=None, endpoint_rates=None, priorities=None):
+        self.venue_rate = venue_rate
+        self.venue_burst = venue_burst
+        self.endpoint_rates = endpoint_rates or {}
+        self.priorities = dict(PRIORITIES, **(priorities or {}))
+        self._buckets = {}
+        self._waiting = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, venue, endpoint):
+        '''
+        :param venue: the venue the request goes to, ``None`` for venue independent requests
+        :param endpoint: the endpoint name of the request
+
+        Blocks until the request may be sent.
+        '''
+        buckets = self._buckets_for(venue, endpoint)
+        if not buckets:
+            return
+
+        ticket = (self.priorities.get(endpoint, DEFAULT_PRIORITY), next(self._counter))
+        with self._condition:
+            waiting = self._waiting.setdefault(venue, [])
+            heapq.heappush(waiting, ticket)
+            try:
+                while True:
+                    now = time.time()
+                    delay = max(bucket.wait_time(now) for bucket in buckets)
+                    if delay == 0 and waiting[0][0] >= ticket[0]:
+                        for bucket in buckets:
+                            bucket.take()
+                        return
+                    self._condition.wait(delay or None)
+            finally:
+                waiting.remove(ticket)
+                heapq.heapify(waiting)
+                self._condition.notify_all()
+
+    def _buckets_for(self, venue, endpoint):
+        buckets = []
+        with self._condition:
+            if self.venue_rate is not None:
+                buckets.append(self._bucket((venue,), self.venue_rate, self.venue_burst))
+            if endpoint in self.endpoint_rates:
+                rate = self.endpoint_rates[endpoint]
+                if not isinstance(rate, tuple):
+                    rate = (rate, None)
+                buckets.append(self._bucket((venue, endpoint), *rate))
+        return buckets
+
+    def _bucket(self, key, rate, burst):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+
+class RetryPolicy(object):
+    '''
+    Decides when a failed request is retried and how long to wait before it is.
+
+    Only idempotent (``'get'``) requests are retried: every ``get_*`` function and \
+    :py:func:`api.order_status`, never orders or cancels. A request is retried if it fails \
+    to connect, times out, returns a body which is not json or returns one of \
+    ``status_codes``. Retries back off exponentially from ``base_delay`` up to \
+    ``max_delay`` with full jitter, so that clients that failed together do not retry \
+    together.
+
+    :param max_retries: the number of retries after the first attempt
+    :param base_delay: the upper bound of the first backoff in seconds
+    :param max_delay: the upper bound of any backoff in seconds
+    :param status_codes: the http status codes which are retried
+    '''
+
+    def __init__(
+        self,
+        max_retries=DEFAULT_MAX_RETRIES,
+        base_delay=DEFAULT_RETRY_DELAY,
+        max_delay=MAX_RETRY_DELAY,
+        status_codes=RETRY_STATUS_CODES,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.status_codes = frozenset(status_codes)
+
+    def retries(self, type_, attempt):
+        '''
+        :param type_: HTTP request type in lowercase
+        :param attempt: the number of retries made so far
+
+        :rtype: boolean
+        :return: ``True`` if a request of this type may be retried again
+        '''
+        return type_ == 'get' and attempt < self.max_retries
+
+    def retries_status(self, status_code):
+        return status_code in self.status_codes
+
+    def delay(self, attempt):
+        '''
+        :param attempt: the number of retries made so far
+
+        :rtype: float
+        :return: seconds to wait before the next retry
+        '''
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
@@ -0,0 +1,140 @@
+from schematics.exceptions import ValidationError
+from schematics.types.compound import ListType, ModelType
+
+import validators
+from timestamps import ParsedTimestamp
+
+_RECORDS = {}
+
+
+class _Field(object):
+    '''
+    Reads one field of a :py:class:`FastRecord` out of its raw json on first access and caches \
+    the result in a slot, converting it with the schematics field it mirrors unless \
+    validation is disabled. A missing field reads as ``None``, as it does on the model.
+    '''
+
+    def __init__(self, name, field):
+        self.name = name
+        self.slot = '_' + name
+        self.field = field
+        self.keys = (field.serialized_name or name,) + tuple(
+            [field.deserialize_from] if isinstance(field.deserialize_from, basestring)
+            else field.deserialize_from or ()
+        )
+        self.record = None
+        if isinstance(field, ListType) and isinstance(field.field, ModelType):
+            self.record = field.field.model_class
+        elif isinstance(field, ModelType):
+            self.record = field.model_class
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            value = self.load(instance)
+            setattr(instance, self.slot, value)
+            return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
+
+    def load(self, instance):
+        raw = instance.json
+        value = None
+        for key in self.keys:
+            if key in raw:
+                value = raw[key]
+                break
+
+        if value is None:
+            return None
+
+        validate = instance._validate
+
+        if self.record is not None:
+            record = fast_model(self.record)
+            if isinstance(self.field, ListType):
+                return [record(item, validate=validate) for item in value]
+            return record(value, validate=validate)
+
+        if validate:
+            return self.field.to_native(value)
+        return value
+
+
+class FastRecord(object):
+    '''
+    A compact stand in for a :py:class:`SFBaseValidator` with the same attribute names.
+
+    Nothing is parsed up front: each attribute is read out of the raw json the first time it \
+    is accessed and kept in a slot, so attributes that are never read cost nothing. If \
+    ``validate`` is ``True``, an attribute is converted with the schematics field it mirrors \
+    when it is read; otherwise the raw json value is returned as is. Either way a missing \
+    attribute reads as ``None``, like on the model loaded with ``strict=False``; required \
+    fields are only checked by :py:meth:`validate`.
+
+    :param raw_data: the deserialized json response
+    :param validate: whether attributes are converted when they are read
+    '''
+    __slots__ = ('json', '_validate')
+    model = None
+
+    def __init__(self, raw_data=None, validate=True, **kwargs):
+        self.json = raw_data if raw_data is not None else {}
+        self._validate = validate
+
+    def __repr__(self):
+        return '<{} record>'.format(self.model.__name__)
+
+    def validate(self):
+        '''
+        Reads every attribute, raising a schematics ``ValidationError`` or \
+        ``ConversionError`` for the first invalid or missing required one.
+        '''
+        validate, self._validate = self._validate, True
+        try:
+            for name, field in self.model._fields.items():
+                value = getattr(self, name)
+                if value is None and field.required:
+                    raise ValidationError({name: [u'This field is required.']})
+                for item in value if isinstance(value, list) else [value]:
+                    if isinstance(item, FastRecord):
+                        item.validate()
+        finally:
+            self._validate = validate
+
+
+def fast_model(model):
+    '''
+    :param model: a :py:class:`SFBaseValidator` subclass e.g. :py:class:`validators.Quote`
+
+    :rtype: a :py:class:`FastRecord` subclass
+    :return: the record class mirroring the model, created on first use
+    '''
+    record = _RECORDS.get(model)
+    if record is None:
+        slots = ['_' + name for name in model._fields]
+        attrs = {'model': model}
+        for name, field in model._fields.items():
+            attrs[name] = _Field(name, field)
+        for name in dir(model):
+            value = getattr(model, name)
+            if isinstance(value, ParsedTimestamp):
+                attrs[name] = value
+                slots.append(value.slot)
+        attrs['__slots__'] = tuple(slots)
+        record = _RECORDS[model] = type(model.__name__, (FastRecord,), attrs)
+    return record
+
+
+Symbol = fast_model(validators.Symbol)
+Stocks = fast_model(validators.Stocks)
+BidOrAsk = fast_model(validators.BidOrAsk)
+Orderbook = fast_model(validators.Orderbook)
+Fills = fast_model(validators.Fills)
+Order = fast_model(validators.Order)
+Orders = fast_model(validators.Orders)
+Quote = fast_model(validators.Quote)
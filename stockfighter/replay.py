@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+from exceptions import ReplayMismatch
+from transport import Transport
+
+
+def _key(type_, path, data):
+    return type_, path, json.dumps(data, sort_keys=True)
+
+
+class RecordingTransport(object):
+    '''
+    Wraps a :py:class:`transport.Transport` and appends every request it makes and the \
+    response it gets to a log with one compact json object per line, of the form \
+    ``{"t": ..., "type": ..., "path": ..., "data": ..., "status": ..., "response": ...}`` \
+    where ``t`` is the unix time the request was sent. Install it with \
+    :py:func:`transport.set_transport` to record a session.
+
+    :param log_path: the file to append to
+    :param transport: the transport which actually sends the requests. If None or \
+        unspecified, a new :py:class:`transport.Transport` is used.
+    '''
+
+    def __init__(self, log_path, transport=None):
+        self.transport = transport if transport is not None else Transport()
+        self._log = open(log_path, 'a', 1)
+        self._lock = threading.Lock()
+
+    def request(self, path, type_='get', data=None, headers=None, body=None):
+        sent = time.time()
+        sc, response = self.transport.request(
+            path, type_=type_, data=data, headers=headers, body=body,
+        )
+        if body is not None:
+            data = json.loads(body)
+        line = json.dumps({
+            't': sent,
+            'type': type_,
+            'path': path,
+            'data': data,
+            'status': sc,
+            'response': response,
+        }, separators=(',', ':'))
+        with self._lock:
+            self._log.write(line + '\n')
+        return sc, response
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+        self.transport.close()
+
+
+class ReplayTransport(object):
+    '''
+    Serves the responses in a log written by :py:class:`RecordingTransport` instead of sending \
+    requests, so a recorded session can be run again through the same :py:mod:`api` calls \
+    with no network.
+
+    By default the responses are served in the order they were recorded and every request \
+    must match the next entry in the log. With ``keyed=True``, each request is instead served \
+    the next unused response recorded for the same method, path and body, so requests can \
+    arrive in a different order than they were recorded in.
+
+    By default responses are served as fast as they are asked for. With ``speed`` set, the \
+    recorded pacing is reproduced, compressed by that factor: with ``speed=3600`` an hour \
+    long session replays in a second. :py:meth:`clock` gives the recorded time the replay \
+    has reached, for strategies which need the session's notion of now.
+
+    :param log_path: the log to replay
+    :param keyed: match requests to responses by key instead of by position
+    :param speed: how many times faster than real time to replay. ``None`` does not wait at all.
+    '''
+
+    def __init__(self, log_path, keyed=False, speed=None):
+        with open(log_path) as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+
+        self.keyed = keyed
+        self.speed = speed
+        self.start = entries[0]['t'] if entries else 0
+        self._now = self.start
+        self._started = None
+        self._entries = deque(entries)
+        self._by_key = defaultdict(deque)
+        if keyed:
+            for entry in entries:
+                self._by_key[_key(entry['type'], entry['path'], entry['data'])].append(entry)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        '''
+        The number of recorded responses not served yet.
+        '''
+        if self.keyed:
+            return sum(len(entries) for entries in self._by_key.values())
+        return len(self._entries)
+
+    def clock(self):
+        '''
+        :rtype: float
+        :return: the unix time, as recorded, of the last request served
+        '''
+        return self._now
+
+    def request(self, path, type_='get', data=None, headers=None, body=None):
+        if body is not None:
+            data = json.loads(body)
+        with self._lock:
+            if self.keyed:
+                entries = self._by_key.get(_key(type_, path, data))
+                if not entries:
+                    raise ReplayMismatch(type_, path)
+                entry = entries.popleft()
+            else:
+                if not self._entries:
+                    raise ReplayMismatch(type_, path)
+                entry = self._entries[0]
+                if entry['type'] != type_ or entry['path'] != path:
+                    raise ReplayMismatch(type_, path, entry)
+                self._entries.popleft()
+            self._now = max(self._now, entry['t'])
+
+        self._pace(entry['t'])
+        return entry['status'], entry['response']
+
+    def close(self):
+        pass
+
+    def _pace(self, recorded):
+        if self.speed is None:
+            return
+        if self._started is None:
+            self._started = time.time()
+        delay = self._started + (recorded - self.start) / float(self.speed) - time.time()
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,222 @@
+import ctypes
+import multiprocessing
+import time
+
+import numpy as np
+
+from async_api import AsyncClient
+from client import Client
+from constants import (
+    DEFAULT_FEED_INTERVAL,
+    DEFAULT_SHARED_CAPACITY,
+)
+from timestamps import parse_ts
+from timeseries import QUOTE_FIELDS
+
+QUOTE_DTYPE = np.dtype(
+    [('seq', np.int64)] + [(field, np.float64) for field in QUOTE_FIELDS] +
+    [('quoteTime', np.int64)]
+)
+
+
+class SharedQuoteRing(object):
+    '''
+    A ring buffer of quotes per stock in shared memory, written by one process and read by \
+    any number of others without copying.
+
+    Each record carries a sequence number which the writer sets to ``-1`` while it updates \
+    the record and to the record's position in the stream once it is done, so a reader can \
+    tell a complete record from one being overwritten. Records are written twice, \
+    ``capacity`` apart, so the last ``n`` quotes of a stock are always one contiguous view. \
+    Quotes the writer failed to fetch are counted per stock in ``errors``, so readers can \
+    tell a stock that has gone quiet from one whose feed is failing.
+
+    The ring must be created before the processes sharing it are started.
+
+    :param symbols: a list of ``(venue, symbol)`` tuples
+    :param capacity: the number of quotes kept per stock
+    '''
+
+    def __init__(self, symbols, capacity=DEFAULT_SHARED_CAPACITY):
+        self.symbols = list(symbols)
+        self.capacity = capacity
+        self._index = dict((key, i) for i, key in enumerate(self.symbols))
+        self._counts = multiprocessing.RawArray(ctypes.c_int64, len(self.symbols))
+        self._errors = multiprocessing.RawArray(ctypes.c_int64, len(self.symbols))
+        self._buffer = multiprocessing.RawArray(
+            ctypes.c_char, len(self.symbols) * 2 * capacity * QUOTE_DTYPE.itemsize
+        )
+        self.counts = np.frombuffer(self._counts, dtype=np.int64)
+        self.errors = np.frombuffer(self._errors, dtype=np.int64)
+        self.records = np.frombuffer(self._buffer, dtype=QUOTE_DTYPE).reshape(
+            len(self.symbols), 2 * capacity
+        )
+
+    def write(self, quote):
+        '''
+        :param quote: a :py:class:`Quote`, :py:class:`records.FastRecord` or raw quote json
+        '''
+        raw = quote if isinstance(quote, dict) else quote.json
+        i = self._index[raw['venue'], raw['symbol']]
+        seq = int(self.counts[i])
+        # seq comes first, so it reads -1 until every other field is written
+        record = tuple(
+            [-1] + [np.nan if raw.get(field) is None else raw[field] for field in QUOTE_FIELDS] +
+            [parse_ts(raw['quoteTime'])]
+        )
+        for position in (seq % self.capacity, seq % self.capacity + self.capacity):
+            self.records[i, position] = record
+            self.records['seq'][i, position] = seq
+        self.counts[i] = seq + 1
+
+    def record_error(self, venue, symbol):
+        '''
+        Counts a failure to fetch a quote for the stock.
+        '''
+        self.errors[self._index[venue, symbol]] += 1
+
+    def error_count(self, venue, symbol):
+        '''
+        :rtype: integer
+        :return: the number of quotes for the stock the writer failed to fetch so far
+        '''
+        return int(self.errors[self._index[venue, symbol]])
+
+    def count(self, venue, symbol):
+        '''
+        :rtype: integer
+        :return: the number of quotes written for the stock so far
+        '''
+        return int(self.counts[self._index[venue, symbol]])
+
+    def window(self, venue, symbol, n=None):
+        '''
+        :param n: the number of most recent quotes. If None, every quote still in the ring.
+
+        :rtype: :py:class:`numpy.ndarray`
+        :return: a view of the quotes with dtype :py:data:`QUOTE_DTYPE`, oldest first. A \
+            record whose ``seq`` is ``-1`` was being overwritten when it was read.
+        '''
+        i = self._index[venue, symbol]
+        count = int(self.counts[i])
+        size = min(count, self.capacity)
+        n = size if n is None else min(n, size)
+        end = count % self.capacity + (self.capacity if count >= self.capacity else 0)
+        return self.records[i][end - n:end]
+
+    def latest(self, venue, symbol):
+        '''
+        :rtype: :py:class:`numpy.void`
+        :return: a copy of the most recent complete quote, ``None`` if there is none yet
+        '''
+        i = self._index[venue, symbol]
+        while True:
+            count = int(self.counts[i])
+            if not count:
+                return None
+            record = self.records[i][(count - 1) % self.capacity].copy()
+            if record['seq'] == count - 1:
+                return record
+
+    def wait(self, venue, symbol, seen, timeout=None, poll=0.001):
+        '''
+        :param seen: the :py:meth:`count` the caller has already processed
+
+        :rtype: integer
+        :return: the new count, once it is greater than ``seen`` or ``timeout`` seconds passed
+        '''
+        deadline = None if timeout is None else time.time() + timeout
+        i = self._index[venue, symbol]
+        while self.counts[i] <= seen and (deadline is None or time.time() < deadline):
+            time.sleep(poll)
+        return int(self.counts[i])
+
+
+def _feed(ring, client_factory, interval, stopped):
+    with AsyncClient(len(ring.symbols), client=client_factory()) as client:
+        while not stopped.is_set():
+            started = time.time()
+            futures = [client.get_quote(venue, symbol) for venue, symbol in ring.symbols]
+            for (venue, symbol), future in zip(ring.symbols, futures):
+                # one failed quote must not stop the feed, but it has to show up somewhere
+                try:
+                    ring.write(future.result())
+                except Exception:
+                    ring.record_error(venue, symbol)
+            stopped.wait(max(0, interval - (time.time() - started)))
+
+
+def _work(strategy, ring, client_factory, stopped):
+    strategy(ring, client_factory(), stopped)
+
+
+class StrategyRunner(object):
+    '''
+    Runs strategies in their own processes, fed by a single market data process.
+
+    One feeder process fetches a quote for every stock every ``interval`` seconds and \
+    writes it to a :py:class:`SharedQuoteRing`, so the API sees one poller however many \
+    strategies there are. Each strategy runs in its own process as \
+    ``strategy(ring, client, stopped)``: it reads market data from the shared ring without \
+    copying, sends orders through its own client and should return once the \
+    ``multiprocessing.Event`` ``stopped`` is set. Quotes the feeder fails to fetch are \
+    counted per stock in the ring, see :py:meth:`SharedQuoteRing.error_count`.
+
+    :param strategies: a list of callables, one process each
+    :param symbols: a list of ``(venue, symbol)`` tuples to feed
+    :param client_factory: a callable creating the :py:class:`client.Client` for each \
+        process. Defaults to :py:class:`client.Client`.
+    :param interval: seconds between quote refreshes
+    :param capacity: the number of quotes kept per stock in the ring
+    '''
+
+    def __init__(
+        self,
+        strategies,
+        symbols,
+        client_factory=Client,
+        interval=DEFAULT_FEED_INTERVAL,
+        capacity=DEFAULT_SHARED_CAPACITY,
+    ):
+        self.strategies = strategies
+        self.client_factory = client_factory
+        self.interval = interval
+        self.ring = SharedQuoteRing(symbols, capacity)
+        self.stopped = multiprocessing.Event()
+        self.processes = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self.stopped.clear()
+        self.processes = [multiprocessing.Process(
+            target=_feed,
+            args=(self.ring, self.client_factory, self.interval, self.stopped),
+        )] + [
+            multiprocessing.Process(
+                target=_work,
+                args=(strategy, self.ring, self.client_factory, self.stopped),
+            )
+            for strategy in self.strategies
+        ]
+        for process in self.processes:
+            process.daemon = True
+            process.start()
+        return self
+
+    def join(self, timeout=None):
+        '''
+        Waits for every strategy to return, then stops the feeder.
+        '''
+        for process in self.processes[1:]:
+            process.join(timeout)
+        self.stop()
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+        for process in self.processes:
+            process.join(timeout)
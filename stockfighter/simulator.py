@@ -0,0 +1,238 @@
+import json
+import re
+import socket
+import threading
+import BaseHTTPServer
+import SocketServer
+
+from constants import (
+    TEST_EXCHANGE,
+    TEST_STOCK,
+)
+from engine import Exchange
+
+_ROUTES = []
+
+
+def _route(method, pattern):
+    def register(handler):
+        _ROUTES.append((method, re.compile('^{}$'.format(pattern)), handler))
+        return handler
+    return register
+
+
+class _NotFound(Exception):
+    pass
+
+
+class Simulator(object):
+    '''
+    An in process stand in for the stockfighter API backed by :py:class:`engine.Exchange`.
+
+    It serves the same REST paths :py:mod:`api` uses, so the client can be pointed at it by \
+    setting the ``SF_API_BASE`` environment variable to :py:attr:`url` before importing \
+    :py:mod:`stockfighter`, or by installing a :py:class:`transport.Transport` with \
+    ``api_base=simulator.url``. Any api key is accepted, but the client still sends one, so \
+    one has to be configured (any string will do, e.g. ``Transport(api_key='test')``).
+
+    :param venues: a dict of venue name to a dict of stock symbol to stock name. Defaults to \
+        :py:data:`TEST_STOCK` on :py:data:`TEST_EXCHANGE`.
+    :param host: the interface to listen on
+    :param port: the port to listen on. ``0`` picks a free port.
+    :param clock: a callable returning the current unix time, for deterministic timestamps
+    '''
+
+    def __init__(self, venues=None, host='127.0.0.1', port=0, clock=None):
+        if venues is None:
+            venues = {TEST_EXCHANGE: {TEST_STOCK: 'Foobar Industries'}}
+
+        kwargs = {} if clock is None else {'clock': clock}
+        self.exchanges = dict(
+            (venue, Exchange(venue, stocks, **kwargs)) for venue, stocks in venues.items()
+        )
+        self.lock = threading.Lock()
+        self.server = _Server((host, port), _Handler)
+        self.server.simulator = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        '''
+        Serves requests in a background thread.
+        '''
+        self._thread = threading.Thread(target=self.server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        '''
+        Stops serving and closes every open connection, waiting for their handlers to exit.
+        '''
+        self.server.shutdown()
+        self.server.server_close()
+        self.server.close_connections()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def handle(self, method, path, body):
+        '''
+        :rtype: (integer, dictionary)
+        :return: the status code and json body of the response to the request
+        '''
+        for route_method, pattern, handler in _ROUTES:
+            match = pattern.match(path)
+            if match and route_method == method:
+                try:
+                    with self.lock:
+                        return 200, handler(self, body, *match.groups())
+                except _NotFound as e:
+                    return 404, {'ok': False, 'error': str(e)}
+                except (KeyError, TypeError, ValueError) as e:
+                    return 400, {'ok': False, 'error': 'Bad request: {}'.format(e)}
+        return 404, {'ok': False, 'error': 'No route for {} {}'.format(method, path)}
+
+    def exchange(self, venue):
+        if venue not in self.exchanges:
+            raise _NotFound('No venue exists with the symbol {}'.format(venue))
+        return self.exchanges[venue]
+
+    def book(self, venue, stock):
+        exchange = self.exchange(venue)
+        if stock not in exchange.books:
+            raise _NotFound('No stock {} on venue {}'.format(stock, venue))
+        return exchange.books[stock]
+
+    def order(self, venue, stock, id_):
+        self.book(venue, stock)
+        order = self.exchange(venue).orders.get(int(id_))
+        if order is None or order.symbol != stock:
+            raise _NotFound('No order {} for {} on venue {}'.format(id_, stock, venue))
+        return order
+
+    @_route('GET', '/heartbeat')
+    def heartbeat(self, body):
+        return {'ok': True, 'error': ''}
+
+    @_route('GET', '/venues/([^/]+)/heartbeat')
+    def venue_heartbeat(self, body, venue):
+        self.exchange(venue)
+        return {'ok': True, 'venue': venue}
+
+    @_route('GET', '/venues/([^/]+)/stocks')
+    def stocks(self, body, venue):
+        return self.exchange(venue).stocks_json()
+
+    @_route('GET', '/venues/([^/]+)/stocks/([^/]+)')
+    def orderbook(self, body, venue, stock):
+        return self.book(venue, stock).orderbook_json()
+
+    @_route('GET', '/venues/([^/]+)/stocks/([^/]+)/quote')
+    def quote(self, body, venue, stock):
+        return self.book(venue, stock).quote_json()
+
+    @_route('POST', '/venues/([^/]+)/stocks/([^/]+)/orders')
+    def place(self, body, venue, stock):
+        self.book(venue, stock)
+        return self.exchange(venue).place(
+            body['account'],
+            stock,
+            body['direction'],
+            body['qty'],
+            body.get('price', 0),
+            body.get('orderType', body.get('type')),
+        ).to_json()
+
+    @_route('GET', '/venues/([^/]+)/stocks/([^/]+)/orders/([0-9]+)')
+    def status(self, body, venue, stock, id_):
+        return self.order(venue, stock, id_).to_json()
+
+    @_route('DELETE', '/venues/([^/]+)/stocks/([^/]+)/orders/([0-9]+)')
+    @_route('POST', '/venues/([^/]+)/stocks/([^/]+)/orders/([0-9]+)/cancel')
+    def cancel(self, body, venue, stock, id_):
+        order = self.order(venue, stock, id_)
+        return self.exchange(venue).cancel(order.id).to_json()
+
+    @_route('GET', '/venues/([^/]+)/accounts/([^/]+)/orders')
+    def account_orders(self, body, venue, account):
+        return self._orders_json(venue, self.exchange(venue).account_orders(account))
+
+    @_route('GET', '/venues/([^/]+)/accounts/([^/]+)/stocks/([^/]+)/orders')
+    def account_stock_orders(self, body, venue, account, stock):
+        self.book(venue, stock)
+        return self._orders_json(venue, self.exchange(venue).account_orders(account, stock))
+
+    def _orders_json(self, venue, orders):
+        return {'ok': True, 'venue': venue, 'orders': [order.to_json() for order in orders]}
+
+
+class _Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        BaseHTTPServer.HTTPServer.__init__(self, *args, **kwargs)
+        # the handler threads of keep-alive connections, which otherwise block reading the
+        # next request after the server is shut down
+        self.connections = {}
+        self._connections_lock = threading.Lock()
+
+    def process_request_thread(self, request, client_address):
+        with self._connections_lock:
+            self.connections[request] = threading.current_thread()
+        try:
+            SocketServer.ThreadingMixIn.process_request_thread(self, request, client_address)
+        finally:
+            with self._connections_lock:
+                self.connections.pop(request, None)
+
+    def close_connections(self, timeout=1):
+        with self._connections_lock:
+            connections = self.connections.items()
+        for request, thread in connections:
+            try:
+                # the blocked read sees the end of the stream and the handler exits cleanly
+                request.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        for request, thread in connections:
+            thread.join(timeout)
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # write each response in one segment instead of one per header line
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length)) if length else {}
+        except ValueError:
+            sc, response = 400, {'ok': False, 'error': 'Request body is not json'}
+        else:
+            path = self.path.split('?')[0].rstrip('/')
+            sc, response = self.server.simulator.handle(self.command, path, body)
+
+        payload = json.dumps(response)
+        self.send_response(sc)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_DELETE = _respond
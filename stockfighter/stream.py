@@ -0,0 +1,175 @@
+import json
+import threading
+import time
+from Queue import Queue, Empty, Full
+
+import websocket
+
+import config
+from constants import (
+    SF_WS_BASE,
+    DEFAULT_STREAM_BUFFER,
+    DEFAULT_RECONNECT_DELAY,
+    MAX_RECONNECT_DELAY,
+    DROP_OLDEST,
+    BLOCK,
+)
+from validators import (
+    Order,
+    Quote,
+)
+
+_CLOSED = object()
+
+
+class _Stream(object):
+    '''
+    Base class for the stockfighter websocket feeds.
+
+    A background thread reads messages off the socket into a bounded buffer and the \
+    consumer iterates over the stream to get them back as schematics objects. If the \
+    connection drops, the reader reconnects with exponential backoff until :py:meth:`close` \
+    is called.
+
+    :param venue: a string with the venue name (case sensitive)
+    :param stock: narrows the feed down to a single stock. If None or unspecified, the feed \
+        covers every stock on the venue.
+    :param account: the trading account the feed belongs to. If None or unspecified, it is \
+        read from :py:mod:`config`.
+    :param ws_base: the url all feed paths are relative to. Defaults to :py:data:`SF_WS_BASE`.
+    :param buffer_size: the number of messages held for a consumer that falls behind
+    :param overflow: what happens when the buffer is full. :py:data:`DROP_OLDEST` discards the \
+        oldest buffered message, :py:data:`BLOCK` stops reading from the socket until the \
+        consumer catches up.
+    '''
+    path = None
+    overflow = BLOCK
+
+    def __init__(
+        self,
+        venue,
+        stock=None,
+        account=None,
+        ws_base=SF_WS_BASE,
+        buffer_size=DEFAULT_STREAM_BUFFER,
+        overflow=None,
+    ):
+        if account is None:
+            account = config.get('account')
+        if overflow is not None:
+            self.overflow = overflow
+
+        self.url = '{}/{}/venues/{}/{}'.format(ws_base, account, venue, self.path)
+        if stock is not None:
+            self.url = '{}/stocks/{}'.format(self.url, stock)
+
+        self.reconnects = 0
+        self.dropped = 0
+        self._buffer = Queue(maxsize=buffer_size)
+        self._closed = threading.Event()
+        self._ws = None
+        self._thread = None
+
+    def __iter__(self):
+        self.start()
+        while True:
+            message = self._buffer.get()
+            if message is _CLOSED:
+                return
+            yield self.parse(message)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        '''
+        Connects and starts reading messages in the background. Iterating over the stream \
+        starts it implicitly.
+        '''
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._read_forever, name=self.url)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def close(self):
+        '''
+        Disconnects and ends iteration once the buffered messages have been consumed.
+        '''
+        self._closed.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+
+    def parse(self, message):
+        raise NotImplementedError
+
+    def _read_forever(self):
+        delay = DEFAULT_RECONNECT_DELAY
+        while not self._closed.is_set():
+            try:
+                self._ws = websocket.create_connection(self.url)
+                delay = DEFAULT_RECONNECT_DELAY
+                while not self._closed.is_set():
+                    self._put(json.loads(self._ws.recv()))
+            except (websocket.WebSocketException, EnvironmentError, ValueError):
+                pass
+            finally:
+                if self._ws is not None:
+                    self._ws.close()
+                    self._ws = None
+
+            if not self._closed.is_set():
+                self.reconnects += 1
+                self._closed.wait(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+        self._buffer.put(_CLOSED)
+
+    def _put(self, message):
+        # any valid json can arrive in a frame, but only ok objects are messages
+        if not isinstance(message, dict) or not message.get('ok'):
+            return
+
+        while True:
+            try:
+                if self.overflow == DROP_OLDEST:
+                    self._buffer.put_nowait(message)
+                else:
+                    self._buffer.put(message, timeout=DEFAULT_RECONNECT_DELAY)
+                return
+            except Full:
+                if self._closed.is_set():
+                    return
+                if self.overflow == DROP_OLDEST:
+                    try:
+                        self._buffer.get_nowait()
+                        self.dropped += 1
+                    except Empty:
+                        pass
+
+
+class TickerTape(_Stream):
+    '''
+    Streams a :py:class:`Quote` every time the market for a stock changes. A consumer that \
+    falls behind only sees the most recent quotes by default.
+    '''
+    path = 'tickertape'
+    overflow = DROP_OLDEST
+
+    def parse(self, message):
+        return Quote(message['quote'], strict=False)
+
+
+class Executions(_Stream):
+    '''
+    Streams the :py:class:`Order` involved in every execution on the account. Executions are \
+    never dropped; a consumer that falls behind applies backpressure to the socket instead.
+    '''
+    path = 'executions'
+
+    def parse(self, message):
+        return Order(message['order'], strict=False)
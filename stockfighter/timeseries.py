@@ -0,0 +1,182 @@
+import numpy as np
+
+from constants import DEFAULT_SERIES_CAPACITY
+from timestamps import parse_ts
+
+QUOTE_FIELDS = ('bid', 'ask', 'bidSize', 'askSize', 'last', 'lastSize')
+
+
+def _check_window(window):
+    if window < 1:
+        raise ValueError('window must be at least 1, not {}'.format(window))
+
+
+def rolling_mean(values, window):
+    '''
+    :param values: a 1-d array
+    :param window: the number of values averaged
+
+    :rtype: :py:class:`numpy.ndarray`
+    :return: the mean of every ``window`` consecutive values, ``len(values) - window + 1`` \
+        of them
+    '''
+    _check_window(window)
+    sums = np.cumsum(np.insert(values, 0, 0.0))
+    return (sums[window:] - sums[:-window]) / window
+
+
+def rolling_vwap(prices, sizes, window):
+    '''
+    :param prices: a 1-d array of trade prices
+    :param sizes: a 1-d array of trade sizes
+    :param window: the number of trades in each average
+
+    :rtype: :py:class:`numpy.ndarray`
+    :return: the volume weighted average price of every ``window`` consecutive trades
+    '''
+    _check_window(window)
+    notional = np.cumsum(np.insert(prices * sizes, 0, 0.0))
+    volume = np.cumsum(np.insert(sizes, 0, 0.0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (notional[window:] - notional[:-window]) / (volume[window:] - volume[:-window])
+
+
+def rolling_volatility(prices, window):
+    '''
+    :param prices: a 1-d array of prices
+    :param window: the number of log returns in each estimate
+
+    :rtype: :py:class:`numpy.ndarray`
+    :return: the standard deviation of the log returns over every ``window`` consecutive \
+        returns, i.e. per observation, not annualized
+    '''
+    returns = np.diff(np.log(prices))
+    mean = rolling_mean(returns, window)
+    mean_square = rolling_mean(returns * returns, window)
+    return np.sqrt(np.maximum(mean_square - mean * mean, 0))
+
+
+class QuoteSeries(object):
+    '''
+    The most recent ``capacity`` quotes for one stock, stored column wise in numpy arrays.
+
+    Each column is written twice, at ``i`` and ``i + capacity``, so the last ``n`` values are \
+    always a contiguous slice and every window is returned as a view, without copying. Prices \
+    and sizes are ``float64`` with ``nan`` where the quote had no value (e.g. no bid); \
+    ``quoteTime`` is ``int64`` nanoseconds since the epoch.
+
+    :param capacity: the number of quotes kept before the oldest are overwritten
+    '''
+
+    def __init__(self, capacity=DEFAULT_SERIES_CAPACITY):
+        self.capacity = capacity
+        self.columns = dict(
+            (field, np.full(2 * capacity, np.nan)) for field in QUOTE_FIELDS
+        )
+        self.columns['quoteTime'] = np.zeros(2 * capacity, dtype=np.int64)
+        # whether the quote reports a trade the previous quote did not
+        self.columns['trade'] = np.zeros(2 * capacity, dtype=bool)
+        self.count = 0
+        self._next = 0
+        self._last_trade = None
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, quote):
+        '''
+        :param quote: a :py:class:`Quote`, :py:class:`records.FastRecord` or raw quote json
+        '''
+        raw = quote if isinstance(quote, dict) else quote.json
+        i, j = self._next, self._next + self.capacity
+        for field in QUOTE_FIELDS:
+            value = raw.get(field)
+            self.columns[field][i] = self.columns[field][j] = np.nan if value is None else value
+        ts = parse_ts(raw['quoteTime'])
+        self.columns['quoteTime'][i] = self.columns['quoteTime'][j] = ts
+        last_trade = raw.get('lastTrade')
+        trade = last_trade is not None and last_trade != self._last_trade
+        self.columns['trade'][i] = self.columns['trade'][j] = trade
+        self._last_trade = last_trade
+
+        self._next = (self._next + 1) % self.capacity
+        self.count += 1
+
+    def window(self, field, n=None):
+        '''
+        :param field: one of :py:data:`QUOTE_FIELDS`, ``'quoteTime'`` or ``'trade'``
+        :param n: the number of most recent values. If None or unspecified, every stored value.
+
+        :rtype: :py:class:`numpy.ndarray`
+        :return: a read only view of the values, oldest first
+        '''
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = self._next + self.capacity if self.count >= self.capacity else self._next
+        view = self.columns[field][end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def mid(self, n=None):
+        return (self.window('bid', n) + self.window('ask', n)) / 2
+
+    def spread(self, n=None):
+        return self.window('ask', n) - self.window('bid', n)
+
+    def rolling_spread(self, window, n=None):
+        return rolling_mean(self.spread(n), window)
+
+    def rolling_mid(self, window, n=None):
+        return rolling_mean(self.mid(n), window)
+
+    def trades(self, n=None):
+        '''
+        :rtype: (:py:class:`numpy.ndarray`, :py:class:`numpy.ndarray`)
+        :return: the prices and sizes of the trades reported in the last ``n`` quotes, each \
+            trade counted once even if several quotes repeat it
+        '''
+        trade = self.window('trade', n)
+        return self.window('last', n)[trade], self.window('lastSize', n)[trade]
+
+    def vwap(self, n=None):
+        prices, sizes = self.trades(n)
+        volume = sizes.sum()
+        return (prices * sizes).sum() / volume if volume else np.nan
+
+    def rolling_vwap(self, window, n=None):
+        return rolling_vwap(*(self.trades(n) + (window,)))
+
+    def volatility(self, n=None):
+        returns = np.diff(np.log(self.mid(n)))
+        returns = returns[~np.isnan(returns)]
+        return returns.std() if len(returns) else np.nan
+
+    def rolling_volatility(self, window, n=None):
+        return rolling_volatility(self.mid(n), window)
+
+
+class QuoteStore(object):
+    '''
+    A :py:class:`QuoteSeries` per ``(venue, symbol)``, created as quotes for it arrive.
+
+    :param capacity: the capacity of each series
+    '''
+
+    def __init__(self, capacity=DEFAULT_SERIES_CAPACITY):
+        self.capacity = capacity
+        self.series = {}
+
+    def __getitem__(self, key):
+        return self.series[key]
+
+    def __contains__(self, key):
+        return key in self.series
+
+    def append(self, quote):
+        raw = quote if isinstance(quote, dict) else quote.json
+        key = (raw['venue'], raw['symbol'])
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = QuoteSeries(self.capacity)
+        series.append(raw)
+        return series
@@ -0,0 +1,110 @@
+from datetime import datetime
+
+_NANOSECONDS = 10 ** 9
+_days = {}
+
+
+def _days_from_civil(year, month, day):
+    # http://howardhinnant.github.io/date_algorithms.html#days_from_civil
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def parse_ts(ts):
+    '''
+    :param ts: a timestamp as returned by the stockfighter API i.e. of the form \
+        ``YYYY-MM-DDTHH:MM:SS[.fffffffff]Z``
+
+    :rtype: integer
+    :return: nanoseconds since the epoch, ``None`` if ``ts`` is ``None``
+
+    Reads the fields at their fixed offsets instead of going through ``strptime``. The \
+    seconds at which each date starts are cached, as a session only ever sees a few dates.
+    '''
+    if ts is None:
+        return None
+
+    date = ts[:10]
+    day = _days.get(date)
+    if day is None:
+        day = _days[date] = _days_from_civil(int(ts[:4]), int(ts[5:7]), int(ts[8:10])) * 86400
+
+    seconds = day + int(ts[11:13]) * 3600 + int(ts[14:16]) * 60 + int(ts[17:19])
+    fraction = ts[20:29].rstrip('Z') if ts[19:20] == '.' else ''
+    return seconds * _NANOSECONDS + int(fraction.ljust(9, '0'))
+
+
+def parse_many(values):
+    '''
+    :param values: a sequence of timestamps as accepted by :py:func:`parse_ts`
+
+    :rtype: :py:class:`numpy.ndarray`
+    :return: an ``int64`` array of nanoseconds since the epoch
+
+    Parses every timestamp at once with vectorized arithmetic on the raw characters.
+    '''
+    import numpy as np
+
+    chars = np.array(values, dtype='S30').view(np.uint8).reshape(-1, 30).astype(np.int64)
+    digits = chars - ord('0')
+
+    def number(start, stop):
+        result = np.zeros(len(digits), dtype=np.int64)
+        for column in range(start, stop):
+            result = result * 10 + digits[:, column]
+        return result
+
+    year, month, day = number(0, 4), number(5, 7), number(8, 10)
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+
+    seconds = days * 86400 + number(11, 13) * 3600 + number(14, 16) * 60 + number(17, 19)
+
+    fraction = digits[:, 20:29]
+    is_digit = (fraction >= 0) & (fraction <= 9) & (chars[:, 19:20] == ord('.'))
+    scale = 10 ** np.arange(8, -1, -1, dtype=np.int64)
+    return seconds * _NANOSECONDS + (np.where(is_digit, fraction, 0) * scale).sum(axis=1)
+
+
+def format_ns(ns):
+    '''
+    :param ns: nanoseconds since the epoch
+
+    :rtype: string
+    :return: the timestamp in the format :py:func:`parse_ts` reads, to the nanosecond
+    '''
+    seconds, fraction = divmod(int(ns), _NANOSECONDS)
+    return '{}.{:09d}Z'.format(
+        datetime.utcfromtimestamp(seconds).strftime('%Y-%m-%dT%H:%M:%S'), fraction,
+    )
+
+
+class ParsedTimestamp(object):
+    '''
+    An attribute holding the timestamp in another attribute parsed with :py:func:`parse_ts`. \
+    It is parsed the first time it is read and cached on the object after that.
+
+    :param field: the name of the attribute with the timestamp string
+    '''
+
+    def __init__(self, field):
+        self.field = field
+        self.slot = '_{}_ns'.format(field)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot)
+        except AttributeError:
+            value = parse_ts(getattr(instance, self.field))
+            setattr(instance, self.slot, value)
+            return value
@@ -0,0 +1,167 @@
+import threading
+from collections import defaultdict
+
+import api
+from constants import (
+    MIN_POLL_INTERVAL,
+    MAX_POLL_INTERVAL,
+)
+
+
+class OrderTracker(object):
+    '''
+    Keeps a set of open orders up to date.
+
+    Instead of one :py:func:`api.order_status` request per order, every refresh makes a \
+    single :py:func:`api.all_orders` request per stock and reconciles all the tracked orders \
+    on it. Fill and close events are sent to the registered callbacks and closed orders stop \
+    being tracked, so the cost of a refresh only depends on the orders still open.
+
+    When run in the background, the tracker refreshes every ``min_interval`` seconds while \
+    orders are filling and backs off by ``backoff`` up to ``max_interval`` while they are not.
+
+    :param min_interval: the shortest time between refreshes in seconds
+    :param max_interval: the longest time between refreshes in seconds
+    :param backoff: the factor the interval grows by after a refresh with no changes
+    :param client: the :py:class:`client.Client` the orders belong to. If None or \
+        unspecified, the functions in :py:mod:`api` are used.
+    '''
+
+    def __init__(
+        self,
+        min_interval=MIN_POLL_INTERVAL,
+        max_interval=MAX_POLL_INTERVAL,
+        backoff=2,
+        client=None,
+    ):
+        self.client = client if client is not None else api
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.last_error = None
+        self._orders = {}
+        self._fill_callbacks = []
+        self._close_callbacks = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, key):
+        '''
+        :param key: a ``(venue, order id)`` tuple, as order ids are only unique per venue
+        '''
+        return key in self._orders
+
+    @property
+    def orders(self):
+        '''
+        The tracked orders as of the last refresh, keyed by ``(venue, order id)``.
+        '''
+        with self._lock:
+            return dict(self._orders)
+
+    def track(self, order):
+        '''
+        :param order: an :py:class:`Order` e.g. as returned by :py:func:`api.trade_stock`
+
+        Starts tracking the order. Fills it already has do not generate events. Orders that \
+        are already closed are ignored.
+        '''
+        if order.open:
+            with self._lock:
+                self._orders[order.venue, order.id] = order
+            self.interval = self.min_interval
+
+    def untrack(self, venue, id_):
+        with self._lock:
+            self._orders.pop((venue, id_), None)
+
+    def on_fill(self, callback):
+        '''
+        :param callback: called as ``callback(order, fills)`` with the updated order and the \
+            list of its fills that are new since the last refresh
+        '''
+        self._fill_callbacks.append(callback)
+
+    def on_close(self, callback):
+        '''
+        :param callback: called as ``callback(order)`` with the final state of an order once \
+            it is filled or cancelled
+        '''
+        self._close_callbacks.append(callback)
+
+    def refresh(self):
+        '''
+        :rtype: boolean
+        :return: ``True`` if any tracked order changed
+
+        Fetches the current state of every tracked order and fires the fill and close \
+        events. Makes one request per stock with tracked orders.
+        '''
+        with self._lock:
+            stocks = defaultdict(set)
+            for order in self._orders.values():
+                stocks[order.venue, order.symbol].add(order.id)
+
+        changed = False
+        for (venue, symbol), ids in stocks.items():
+            for order in self.client.all_orders(venue, symbol).orders:
+                if order.id in ids:
+                    changed = self._update(venue, order) or changed
+
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return changed
+
+    def start(self):
+        '''
+        Refreshes in a background thread until :py:meth:`stop` is called. Errors raised by a \
+        refresh are kept in ``last_error`` and do not stop the thread.
+        '''
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = e
+            self._stopped.wait(self.interval)
+
+    def _update(self, venue, order):
+        with self._lock:
+            key = (venue, order.id)
+            previous = self._orders.get(key)
+            if previous is None:
+                return False
+            if order.open:
+                self._orders[key] = order
+            else:
+                del self._orders[key]
+
+        new_fills = (order.fills or [])[len(previous.fills or []):]
+        if new_fills:
+            for callback in self._fill_callbacks:
+                callback(order, new_fills)
+        if not order.open:
+            for callback in self._close_callbacks:
+                callback(order)
+
+        return bool(new_fills) or not order.open
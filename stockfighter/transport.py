@@ -0,0 +1,260 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from codec import get_codec
+from constants import (
+    SF_API_BASE,
+    SF_AUTH_HEADER_KEY,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_TIMEOUT,
+)
+
+
+def venue_of(path):
+    '''
+    :param path: a path to the stockfighter API e.g. ``'/venues/TESTEX/stocks'``
+
+    :rtype: string
+    :return: the venue the path refers to or ``None`` if the path is not venue specific
+    '''
+    parts = path.split('/')
+    if len(parts) > 2 and parts[1] == 'venues':
+        return parts[2]
+    return None
+
+
+def endpoint_of(type_, path):
+    '''
+    :param type_: HTTP request type in lowercase i.e. ``'get'``, ``'post'``, ``'delete'`` etc.
+    :param path: a path to the stockfighter API
+
+    :rtype: string
+    :return: the name of the API endpoint the request hits, one of ``'heartbeat'``, \
+        ``'stocks'``, ``'orderbook'``, ``'quote'``, ``'order'``, ``'status'``, ``'cancel'``, \
+        ``'orders'`` or ``'other'``
+    '''
+    parts = path.strip('/').split('/')
+    last = parts[-1]
+    if last == 'heartbeat':
+        return 'heartbeat'
+    if 'accounts' in parts:
+        return 'orders'
+    if last == 'cancel' or (type_ == 'delete' and 'orders' in parts):
+        return 'cancel'
+    if last == 'orders':
+        return 'order'
+    if len(parts) > 1 and parts[-2] == 'orders':
+        return 'status'
+    if last == 'quote':
+        return 'quote'
+    if last == 'stocks':
+        return 'stocks'
+    if len(parts) > 1 and parts[-2] == 'stocks':
+        return 'orderbook'
+    return 'other'
+
+
+class Transport(object):
+    '''
+    Sends requests to the stockfighter API over persistent HTTP connections.
+
+    Every venue gets its own :py:class:`requests.Session` with a connection pool of \
+    ``pool_size`` connections, so consecutive orders, quotes and cancels reuse an already \
+    established (and TLS negotiated) connection instead of opening a new one per call. The \
+    authorization header is attached to the session once when it is created.
+
+    :param api_base: the url all paths are relative to. Defaults to :py:data:`SF_API_BASE`.
+    :param api_key: the stockfighter api key. If None or unspecified, it is read from \
+        :py:mod:`config` when the first session is opened.
+    :param pool_size: the maximum number of connections kept open per venue
+    :param keep_alive: if ``False``, connections are closed after every request
+    :param timeout: seconds to wait for the server before giving up. ``None`` waits forever.
+    :param rate_limiter: a :py:class:`ratelimit.RateLimiter` every request waits on before \
+        it is sent. If None or unspecified, requests are never held back.
+    :param retry_policy: a :py:class:`ratelimit.RetryPolicy` deciding whether failed \
+        idempotent requests are retried. If None or unspecified, nothing is retried.
+    :param instrumentation: an :py:class:`instrumentation.Instrumentation` which times every \
+        request and runs its hooks. If None or unspecified, nothing is recorded.
+    :param circuit_breaker: a :py:class:`health.CircuitBreaker` which makes requests to \
+        venues that are down fail fast. If None or unspecified, every request is sent.
+    :param codec: the :py:class:`codec.Codec` request and response bodies are encoded and \
+        decoded with. If None or unspecified, :py:func:`codec.get_codec` is used.
+    '''
+
+    def __init__(
+        self,
+        api_base=SF_API_BASE,
+        api_key=None,
+        pool_size=DEFAULT_POOL_SIZE,
+        keep_alive=True,
+        timeout=DEFAULT_TIMEOUT,
+        rate_limiter=None,
+        retry_policy=None,
+        instrumentation=None,
+        circuit_breaker=None,
+        codec=None,
+    ):
+        self.api_base = api_base
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.instrumentation = instrumentation
+        self.circuit_breaker = circuit_breaker
+        self.codec = codec if codec is not None else get_codec()
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    def session(self, venue=None):
+        '''
+        :param venue: the venue the session talks to. ``None`` is used for requests which \
+            are not venue specific.
+
+        :rtype: :py:class:`requests.Session`
+        :return: the pooled session for the venue, created on first use
+        '''
+        session = self._sessions.get(venue)
+        if session is None:
+            # only one thread may create a venue's session, or the others' pools would leak
+            with self._sessions_lock:
+                session = self._sessions.get(venue)
+                if session is None:
+                    session = self._sessions[venue] = self._open_session()
+        return session
+
+    def request(self, path, type_='get', data=None, headers=None, body=None):
+        '''
+        :param path: The path to the stockfighter API
+        :param type_: HTTP request type in lowercase i.e. ``'get'``, ``'post'``, ``'delete'`` etc.
+        :param data: a python dict which will be serialized and sent as json
+        :param headers: extra headers to send along with this request only
+        :param body: an already encoded json body, sent as is instead of ``data``
+
+        :rtype: (integer, dictionary)
+        :return: a tuple of status code and deserialized json response as a python dict
+        '''
+        venue = venue_of(path)
+        endpoint = endpoint_of(type_, path)
+        if body is None and data is not None:
+            body = self.codec.dumps(data)
+        # heartbeats get through open circuits, health.HeartbeatMonitor reports them instead
+        breaker = self.circuit_breaker if endpoint != 'heartbeat' else None
+        attempt = 0
+        while True:
+            if breaker is not None:
+                breaker.allow(venue)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(venue, endpoint)
+
+            try:
+                sc, json = self._send(venue, endpoint, path, type_, body, headers)
+            except (requests.RequestException, ValueError):
+                if breaker is not None:
+                    breaker.record_failure(venue)
+                if not self._retry(type_, attempt):
+                    raise
+            else:
+                if breaker is not None:
+                    breaker.record(venue, sc)
+                if not (self._retry(type_, attempt) and self.retry_policy.retries_status(sc)):
+                    return sc, json
+
+            time.sleep(self.retry_policy.delay(attempt))
+            attempt += 1
+
+    def close(self):
+        '''
+        Closes every pooled connection.
+        '''
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+    def _send(self, venue, endpoint, path, type_, body, headers):
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            response = self._http(venue, path, type_, body, headers)
+            return response.status_code, self.codec.loads(response.content)
+
+        instrumentation.before(endpoint, type_, path, body)
+        sc = None
+        try:
+            start = time.time()
+            response = self._http(venue, path, type_, body, headers)
+            content = response.content
+            received = time.time()
+            sc = response.status_code
+            json = self.codec.loads(content)
+            decoded = time.time()
+        except Exception as e:
+            instrumentation.after(endpoint, type_, path, sc, error=e)
+            raise
+
+        wait = response.elapsed.total_seconds()
+        instrumentation.record(endpoint, 'wait', wait)
+        instrumentation.record(endpoint, 'transfer', max(received - start - wait, 0))
+        instrumentation.record(endpoint, 'decode', decoded - received)
+        instrumentation.record(endpoint, 'total', decoded - start)
+        instrumentation.after(endpoint, type_, path, sc, json)
+        return sc, json
+
+    def _http(self, venue, path, type_, body, headers):
+        return self.session(venue).request(
+            type_,
+            self.api_base + path,
+            headers=headers,
+            data=body,
+            timeout=self.timeout,
+        )
+
+    def _retry(self, type_, attempt):
+        return self.retry_policy is not None and self.retry_policy.retries(type_, attempt)
+
+    def _open_session(self):
+        if self.api_key is None:
+            self.api_key = config.get('api_key')
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers[SF_AUTH_HEADER_KEY] = self.api_key
+        # every body is json, so the header is set once rather than per request
+        session.headers['Content-Type'] = 'application/json'
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+
+_transport = None
+
+
+def get_transport():
+    '''
+    :rtype: :py:class:`Transport`
+    :return: the transport used by the functions in :py:mod:`api`, created on first use
+    '''
+    global _transport
+    if _transport is None:
+        _transport = Transport()
+    return _transport
+
+
+def set_transport(transport):
+    '''
+    :param transport: the :py:class:`Transport` (or any object with a compatible \
+        ``request`` method) the functions in :py:mod:`api` should use
+
+    The previous transport is closed.
+    '''
+    global _transport
+    if _transport is not None and _transport is not transport:
+        _transport.close()
+    _transport = transport
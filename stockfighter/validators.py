@@ -1,8 +1,10 @@
 from schematics.models import Model
-from schematics.types import StringType, IntType
+from schematics.types import StringType, IntType, FloatType
 from schematics.types.base import BooleanType
 from schematics.types.compound import ListType, ModelType
 
+from timestamps import ParsedTimestamp
+
 
 class SFBaseValidator(Model):
     def __init__(self, raw_data=None, **kwargs):
@@ -32,6 +34,11 @@ class Orderbook(SFBaseValidator):
     bids = ListType(ModelType(BidOrAsk))
     asks = ListType(ModelType(BidOrAsk))
     ts = StringType(required=True)
+    # set by clocksync.ClockSync
+    staleness = FloatType()
+    latency = FloatType()
+
+    ts_ns = ParsedTimestamp('ts')
 
 
 class Fills(SFBaseValidator):
@@ -39,6 +46,8 @@ class Fills(SFBaseValidator):
     qty = IntType(required=True)
     ts = StringType(required=True)
 
+    ts_ns = ParsedTimestamp('ts')
+
 
 class Order(SFBaseValidator):
     symbol = StringType(required=True)
@@ -47,13 +56,18 @@ class Order(SFBaseValidator):
     originalQty = IntType(required=True)
     qty = IntType(required=True)
     price = IntType(required=True)
-    type = StringType(required=True)
+    type = StringType(required=True, deserialize_from='orderType')
     id = IntType(required=True)
     account = StringType(required=True)
     ts = StringType(required=True)
     fills = ListType(ModelType(Fills))
     totalFilled = IntType(required=True)
     open = BooleanType(required=True)
+    # set by clocksync.ClockSync
+    staleness = FloatType()
+    latency = FloatType()
+
+    ts_ns = ParsedTimestamp('ts')
 
     def __init__(self, raw_data=None, **kwargs):
         if isinstance(raw_data, dict) and 'orderType' in raw_data:
@@ -63,7 +77,7 @@ class Order(SFBaseValidator):
 
 class Orders(SFBaseValidator):
     venue = StringType(required=True)
-    orders = ListType(Order)
+    orders = ListType(ModelType(Order, strict=False))
 
 
 class Quote(SFBaseValidator):
@@ -79,3 +93,9 @@ class Quote(SFBaseValidator):
     lastSize = IntType(required=True)
     lastTrade = StringType(required=True)
     quoteTime = StringType(required=True)
+    # set by clocksync.ClockSync
+    staleness = FloatType()
+    latency = FloatType()
+
+    last_trade_ns = ParsedTimestamp('lastTrade')
+    quote_time_ns = ParsedTimestamp('quoteTime')
@@ -0,0 +1,63 @@
+import shutil
+import tempfile
+import unittest
+
+from stockfighter.archive import ArchiveReader, ArchiveWriter
+from stockfighter.timestamps import format_ns
+
+
+def _order(venue, id_, ts, direction='buy'):
+    return {
+        'venue': venue, 'symbol': 'FOO', 'id': id_, 'direction': direction,
+        'fills': [{'price': 100 + t, 'qty': 1, 'ts': format_ns(t)} for t in ts],
+    }
+
+
+class ArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_out_of_order_fills_are_kept_and_read_back_sorted(self):
+        with ArchiveWriter(self.root, segment_records=2) as writer:
+            self.assertEqual(writer.write_fills(_order('ONEEX', 1, [100, 300])), 2)
+            self.assertEqual(writer.write_fills(_order('ONEEX', 2, [200])), 1)
+            self.assertEqual(writer.write_fills(_order('ONEEX', 2, [200, 50])), 1)
+            self.assertEqual(writer.write_fills(_order('ONEEX', 2, [200, 50])), 0)
+            self.assertEqual(writer.dropped, 0)
+
+        reader = ArchiveReader(self.root)
+        fills, = reader.fills('ONEEX', 'FOO')
+        self.assertEqual(list(fills['ts']), [50, 100, 200, 300])
+        self.assertEqual(list(fills['id']), [2, 1, 2, 1])
+
+        fills, = reader.fills('ONEEX', 'FOO', start=60, end=300)
+        self.assertEqual(list(fills['ts']), [100, 200])
+        self.assertEqual(reader.fills('ONEEX', 'FOO', start=400), [])
+
+    def test_same_order_id_on_two_venues_is_written_separately(self):
+        with ArchiveWriter(self.root) as writer:
+            writer.write_fills(_order('ONEEX', 1, [100]))
+            self.assertEqual(writer.write_fills(_order('TWOEX', 1, [100])), 1)
+
+        reader = ArchiveReader(self.root)
+        self.assertEqual(len(reader.fills('TWOEX', 'FOO')[0]), 1)
+
+
+    def test_a_restarted_writer_skips_fills_already_archived(self):
+        with ArchiveWriter(self.root, segment_records=2) as writer:
+            writer.write_fills(_order('ONEEX', 1, [100, 200]))
+            writer.write_fills(_order('ONEEX', 2, [150]))
+
+        with ArchiveWriter(self.root, segment_records=2) as writer:
+            self.assertEqual(writer.write_fills(_order('ONEEX', 2, [150])), 0)
+            self.assertEqual(writer.write_fills(_order('ONEEX', 1, [100, 200, 300])), 1)
+            self.assertEqual(writer.write_fills(_order('TWOEX', 1, [100])), 1)
+
+        fills, = ArchiveReader(self.root).fills('ONEEX', 'FOO')
+        self.assertEqual(list(fills['ts']), [100, 150, 200, 300])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from stockfighter.bookdiff import BookHistory
+from stockfighter.timestamps import parse_ts
+
+
+def _book(ts, bids, asks):
+    return {
+        'ok': True, 'venue': 'ONEEX', 'symbol': 'FOO', 'ts': ts,
+        'bids': [{'price': p, 'qty': q, 'isBuy': True} for p, q in bids],
+        'asks': [{'price': p, 'qty': q, 'isBuy': False} for p, q in asks],
+    }
+
+
+class BookHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.history = BookHistory('ONEEX', 'FOO', keyframe_interval=2)
+        self.books = [
+            _book('2016-01-01T00:00:0{}.123456Z'.format(i), [(100 - i, 10 + i)], [(110, i + 1)])
+            for i in range(5)
+        ]
+        for book in self.books:
+            self.history.append(book)
+
+    def test_books_are_rebuilt_from_keyframes_and_deltas(self):
+        self.assertEqual(len(self.history), 5)
+        for i, book in enumerate(self.books):
+            rebuilt = self.history.book(i)
+            self.assertEqual(rebuilt['bids'], book['bids'])
+            self.assertEqual(rebuilt['asks'], book['asks'])
+
+    def test_timestamps_are_rebuilt_from_nanoseconds(self):
+        self.assertEqual(self.history.book(-1)['ts'], '2016-01-01T00:00:04.123456000Z')
+        self.assertEqual(parse_ts(self.history.book(1)['ts']), parse_ts(self.books[1]['ts']))
+        self.assertEqual(self.history.book_at(self.books[2]['ts'])['bids'], self.books[2]['bids'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import json
+import unittest
+
+from stockfighter.client import Client
+
+
+class _Transport(object):
+    '''
+    Records request bodies and answers every request with an order.
+    '''
+
+    def __init__(self):
+        self.bodies = []
+
+    def request(self, path, type_='get', data=None, headers=None, body=None):
+        self.bodies.append(json.loads(body))
+        return 200, {'ok': True, 'id': 1, 'venue': 'TESTEX', 'symbol': 'FOOBAR', 'open': True}
+
+
+class TradeStockTest(unittest.TestCase):
+
+    def test_prices_are_rounded_to_cents(self):
+        transport = _Transport()
+        client = Client(account='EXB123456', transport=transport)
+
+        for price in (0.29, 0.57, 1.15, 10.1):
+            client.trade_stock(1, 'buy', price=price, order_type='limit')
+
+        self.assertEqual([body['price'] for body in transport.bodies], [29, 57, 115, 1010])
+
+    def test_market_orders_have_no_price(self):
+        transport = _Transport()
+        Client(account='EXB123456', transport=transport).trade_stock(1, 'sell', price=None)
+
+        self.assertEqual(transport.bodies[0]['price'], 0)
+        self.assertEqual(transport.bodies[0]['orderType'], 'market')
+
+
+if __name__ == '__main__':
+    unittest.main()
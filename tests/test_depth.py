@@ -0,0 +1,27 @@
+import unittest
+
+import numpy as np
+
+from stockfighter.depth import fill_price
+
+
+class FillPriceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.prices = np.array([100, 101, 103])
+        self.qtys = np.array([10, 5, 5])
+
+    def test_sweeps_the_levels_in_order(self):
+        self.assertEqual(fill_price(self.prices, self.qtys, 10), 100)
+        self.assertAlmostEqual(fill_price(self.prices, self.qtys, 15), (1000 + 505) / 15.0)
+
+    def test_nan_when_the_side_is_too_thin(self):
+        self.assertTrue(np.isnan(fill_price(self.prices, self.qtys, 21)))
+
+    def test_nan_for_a_quantity_that_is_not_positive(self):
+        self.assertTrue(np.isnan(fill_price(self.prices, self.qtys, 0)))
+        self.assertTrue(np.isnan(fill_price(self.prices, self.qtys, -5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
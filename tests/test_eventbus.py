@@ -0,0 +1,61 @@
+import threading
+import time
+import unittest
+from collections import namedtuple
+
+from stockfighter import records
+from stockfighter.constants import BBO, EVENT_BATCH
+from stockfighter.eventbus import EventBus
+
+_Event = namedtuple('_Event', ['kind', 'venue', 'symbol'])
+
+
+def _quote(ts, bid):
+    return records.Quote({
+        'ok': True, 'venue': 'ONEEX', 'symbol': 'FOO', 'bid': bid, 'ask': 110, 'bidSize': 1,
+        'askSize': 1, 'quoteTime': '2016-01-01T00:00:0{}.000Z'.format(ts),
+    })
+
+
+class EventBusTest(unittest.TestCase):
+
+    def test_busy_subscribers_do_not_starve_the_others(self):
+        bus = EventBus(workers=1)
+        gate = threading.Event()
+        calls = []
+
+        def busy(event):
+            gate.wait(5)
+            calls.append(event.symbol)
+
+        bus.subscribe(busy, symbol='BUSY')
+        bus.subscribe(lambda event: calls.append(event.symbol), symbol='QUIET')
+        for _ in range(3 * EVENT_BATCH):
+            bus.publish(_Event('test', 'ONEEX', 'BUSY'))
+        bus.publish(_Event('test', 'ONEEX', 'QUIET'))
+        gate.set()
+        # closing first would have the last worker finish every queue in turn
+        deadline = time.time() + 5
+        while len(calls) < 3 * EVENT_BATCH + 1 and time.time() < deadline:
+            time.sleep(0.01)
+        bus.close()
+
+        self.assertEqual(len(calls), 3 * EVENT_BATCH + 1)
+        self.assertEqual(calls.index('QUIET'), EVENT_BATCH)
+
+    def test_quotes_older_than_the_last_one_are_dropped(self):
+        bus = EventBus()
+        events = []
+        bus.subscribe(events.append, kinds=BBO)
+
+        bus.publish_quote(_quote(2, 100))
+        bus.publish_quote(_quote(1, 90))
+        bus.publish_quote(_quote(2, 100))
+        bus.publish_quote(_quote(3, 101))
+        bus.close()
+
+        self.assertEqual([event.bid for event in events], [100, 101])
+
+
+if __name__ == '__main__':
+    unittest.main()
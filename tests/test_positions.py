@@ -0,0 +1,48 @@
+import unittest
+from collections import namedtuple
+
+from stockfighter.positions import PositionBook
+
+_Order = namedtuple('_Order', ['venue', 'symbol', 'id', 'direction', 'fills'])
+_Fill = namedtuple('_Fill', ['price', 'qty'])
+
+
+class PositionBookTest(unittest.TestCase):
+
+    def test_orders_are_applied_once(self):
+        book = PositionBook()
+        order = _Order('ONEEX', 'FOO', 1, 'buy', [_Fill(100, 10)])
+
+        self.assertEqual(book.apply_order(order), 1)
+        self.assertEqual(book.apply_order(order), 0)
+        self.assertEqual(book.apply_order(order._replace(fills=order.fills * 2)), 1)
+        self.assertEqual(book['ONEEX', 'FOO'].qty, 20)
+
+    def test_same_order_id_on_two_venues_is_applied_separately(self):
+        book = PositionBook()
+
+        book.apply_order(_Order('ONEEX', 'FOO', 1, 'buy', [_Fill(100, 10)]))
+        self.assertEqual(book.apply_order(_Order('TWOEX', 'FOO', 1, 'sell', [_Fill(110, 5)])), 1)
+
+        self.assertEqual(book['ONEEX', 'FOO'].qty, 10)
+        self.assertEqual(book['TWOEX', 'FOO'].qty, -5)
+
+    def test_apply_fill_deduplicates_per_venue(self):
+        book = PositionBook()
+
+        self.assertTrue(book.apply_fill('ONEEX', 'FOO', 'buy', 100, 10, order_id=1, index=0))
+        self.assertFalse(book.apply_fill('ONEEX', 'FOO', 'buy', 100, 10, order_id=1, index=0))
+        self.assertTrue(book.apply_fill('TWOEX', 'FOO', 'buy', 100, 10, order_id=1, index=0))
+
+
+    def test_apply_fill_needs_both_order_id_and_index(self):
+        book = PositionBook()
+
+        self.assertRaises(ValueError, book.apply_fill, 'ONEEX', 'FOO', 'buy', 100, 1, order_id=1)
+        self.assertRaises(ValueError, book.apply_fill, 'ONEEX', 'FOO', 'buy', 100, 1, index=0)
+        self.assertTrue(book.apply_fill('ONEEX', 'FOO', 'buy', 100, 1))
+        self.assertEqual(book['ONEEX', 'FOO'].qty, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from schematics.exceptions import ValidationError
+
+from stockfighter import records, validators
+
+_QUOTE = {
+    'ok': True, 'symbol': 'FOOBAR', 'venue': 'TESTEX', 'bid': 5000, 'bidSize': 10,
+    'bidDepth': 10, 'askSize': 0, 'askDepth': 0, 'quoteTime': '2016-01-01T00:00:00.000Z',
+}
+
+
+class FastRecordTest(unittest.TestCase):
+
+    def test_missing_fields_read_as_none_like_the_model(self):
+        model = validators.Quote(dict(_QUOTE), strict=False)
+        for validate in (True, False):
+            quote = records.Quote(dict(_QUOTE), validate=validate)
+            self.assertEqual(quote.ask, model.ask)
+            self.assertIsNone(quote.ask)
+            self.assertEqual(quote.bid, 5000)
+
+    def test_values_are_converted_when_validating(self):
+        quote = records.Quote(dict(_QUOTE, bid='5000'))
+        self.assertEqual(quote.bid, 5000)
+
+    def test_validate_checks_required_fields(self):
+        self.assertRaises(ValidationError, records.Quote(dict(_QUOTE)).validate)
+        records.Quote(dict(
+            _QUOTE, ask=5100, last=5050, lastSize=1, lastTrade='2016-01-01T00:00:00.000Z',
+        )).validate()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import threading
+import unittest
+
+from stockfighter.runner import SharedQuoteRing, _feed
+
+_QUOTE = {
+    'ok': True, 'symbol': 'FOO', 'venue': 'ONEEX', 'bid': 5000, 'ask': 5100, 'bidSize': 1,
+    'askSize': 1, 'bidDepth': 1, 'askDepth': 1, 'last': 5050, 'lastSize': 1,
+    'lastTrade': '2016-01-01T00:00:00.000Z', 'quoteTime': '2016-01-01T00:00:00.000Z',
+}
+
+
+class _Client(object):
+    '''
+    Serves a quote for FOO and fails for every other stock.
+    '''
+
+    def __init__(self, stopped):
+        self.stopped = stopped
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_quote(self, venue, symbol):
+        with self._lock:
+            self.calls += 1
+            if self.calls >= 6:
+                self.stopped.set()
+        if symbol != 'FOO':
+            raise ValueError('no such stock')
+        return dict(_QUOTE, venue=venue, symbol=symbol)
+
+
+class FeedTest(unittest.TestCase):
+
+    def test_failed_quotes_are_counted_without_stopping_the_feed(self):
+        ring = SharedQuoteRing([('ONEEX', 'FOO'), ('ONEEX', 'BAR')], capacity=4)
+        stopped = threading.Event()
+
+        _feed(ring, lambda: _Client(stopped), 0, stopped)
+
+        self.assertEqual(ring.count('ONEEX', 'FOO'), 3)
+        self.assertEqual(ring.error_count('ONEEX', 'FOO'), 0)
+        self.assertEqual(ring.count('ONEEX', 'BAR'), 0)
+        self.assertEqual(ring.error_count('ONEEX', 'BAR'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
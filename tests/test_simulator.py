@@ -0,0 +1,38 @@
+import unittest
+
+import requests
+
+from stockfighter.client import Client
+from stockfighter.simulator import Simulator
+from stockfighter.transport import Transport
+
+
+class SimulatorTest(unittest.TestCase):
+
+    def test_trades_through_a_client(self):
+        with Simulator() as simulator:
+            client = Client(account='EXB123456', transport=Transport(
+                api_key='test', api_base=simulator.url,
+            ))
+            client.trade_stock(10, 'sell', price=50.0, order_type='limit')
+            order = client.trade_stock(4, 'buy', price=50.0, order_type='limit')
+            client.close()
+
+        self.assertEqual(order.totalFilled, 4)
+        self.assertFalse(order.open)
+
+    def test_stop_closes_keep_alive_connections(self):
+        simulator = Simulator().start()
+        session = requests.Session()
+        self.assertTrue(session.get(simulator.url + '/heartbeat').json()['ok'])
+        self.assertEqual(len(simulator.server.connections), 1)
+        handler, = simulator.server.connections.values()
+
+        simulator.stop()
+
+        self.assertFalse(handler.is_alive())
+        self.assertEqual(simulator.server.connections, {})
+        session.close()
+
+if __name__ == '__main__':
+    unittest.main()
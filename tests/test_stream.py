@@ -0,0 +1,200 @@
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+import unittest
+
+from stockfighter.constants import (
+    BLOCK,
+    DEFAULT_RECONNECT_DELAY,
+    DROP_OLDEST,
+)
+from stockfighter.stream import (
+    Executions,
+    TickerTape,
+)
+
+_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def _frame(text):
+    if len(text) < 126:
+        return '\x81' + chr(len(text)) + text
+    return '\x81\x7e' + struct.pack('>H', len(text)) + text
+
+
+def _quote(i):
+    return {
+        'ok': True,
+        'quote': {
+            'symbol': 'FOOBAR', 'venue': 'TESTEX', 'bid': i, 'ask': 100, 'bidSize': 1,
+            'askSize': 1, 'bidDepth': 1, 'askDepth': 1, 'last': 50, 'lastSize': 1,
+            'lastTrade': '2016-01-01T00:00:00.000Z', 'quoteTime': '2016-01-01T00:00:00.000Z',
+        },
+    }
+
+
+def _execution(i):
+    return {
+        'ok': True,
+        'order': {
+            'symbol': 'FOOBAR', 'venue': 'TESTEX', 'direction': 'buy', 'originalQty': 1,
+            'qty': 0, 'price': 100, 'orderType': 'limit', 'id': i, 'account': 'EXB123456',
+            'ts': '2016-01-01T00:00:00.000Z', 'fills': [], 'totalFilled': 1, 'open': False,
+        },
+    }
+
+
+class WebSocketStandIn(object):
+    '''
+    A local stand in for the stockfighter websocket server. Every connection is sent the \
+    next list of messages in ``connections`` and then dropped; once the lists run out, \
+    connections are held open without sending anything. With ``handshake=False``, \
+    connections are dropped before the websocket handshake, so connecting fails.
+    '''
+
+    def __init__(self, connections=(), handshake=True):
+        self.connections = list(connections)
+        self.handshake = handshake
+        self.accepted = []
+        self._held = []
+        self._socket = socket.socket()
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(5)
+        self.url = 'ws://127.0.0.1:{}'.format(self._socket.getsockname()[1])
+        thread = threading.Thread(target=self._serve)
+        thread.daemon = True
+        thread.start()
+
+    def close(self):
+        self._socket.close()
+        for connection in self._held:
+            connection.close()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self._socket.accept()
+            except socket.error:
+                return
+            self.accepted.append(time.time())
+            if not self.handshake:
+                connection.close()
+                continue
+
+            request = connection.recv(4096)
+            key = [
+                line.split(':', 1)[1].strip() for line in request.split('\r\n')
+                if line.lower().startswith('sec-websocket-key')
+            ][0]
+            accept = base64.b64encode(hashlib.sha1(key + _GUID).digest())
+            connection.sendall(
+                'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n'
+                'Connection: Upgrade\r\nSec-WebSocket-Accept: {}\r\n\r\n'.format(accept)
+            )
+            if not self.connections:
+                self._held.append(connection)
+                continue
+            for message in self.connections.pop(0):
+                connection.sendall(_frame(json.dumps(message)))
+            connection.close()
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.01)
+
+
+class StreamTest(unittest.TestCase):
+
+    def stream(self, cls, server, **kwargs):
+        stream = cls('TESTEX', stock='FOOBAR', account='EXB123456', ws_base=server.url, **kwargs)
+        self.addCleanup(self.close, stream)
+        self.addCleanup(server.close)
+        return stream
+
+    def close(self, stream):
+        stream.close()
+        # iteration only ends once the reader thread is done, so it does not die with the
+        # interpreter
+        for _ in stream:
+            pass
+
+    def test_parses_quotes_and_skips_errors(self):
+        server = WebSocketStandIn([[_quote(1), {'ok': False, 'error': 'nope'}, _quote(2)]])
+        tape = iter(self.stream(TickerTape, server))
+
+        quotes = [next(tape), next(tape)]
+
+        self.assertEqual([quote.bid for quote in quotes], [1, 2])
+        self.assertEqual(quotes[0].symbol, 'FOOBAR')
+        self.assertEqual(quotes[0].venue, 'TESTEX')
+
+    def test_skips_frames_that_are_not_objects(self):
+        server = WebSocketStandIn([[_quote(1), [1, 2], 5, 'text', None, _quote(2)]])
+        tape = iter(self.stream(TickerTape, server))
+
+        self.assertEqual([next(tape).bid for _ in range(2)], [1, 2])
+
+    def test_parses_executions(self):
+        server = WebSocketStandIn([[_execution(7)]])
+        order = next(iter(self.stream(Executions, server)))
+
+        self.assertEqual(order.id, 7)
+        self.assertEqual(order.type, 'limit')
+        self.assertFalse(order.open)
+
+    def test_reconnects_after_the_server_drops_the_connection(self):
+        server = WebSocketStandIn([[_quote(1), _quote(2)], [_quote(3)]])
+        tape = self.stream(TickerTape, server)
+        quotes = iter(tape)
+
+        self.assertEqual([next(quotes).bid for _ in range(3)], [1, 2, 3])
+        self.assertGreaterEqual(tape.reconnects, 1)
+
+    def test_backs_off_between_failed_connects(self):
+        server = WebSocketStandIn(handshake=False)
+        self.stream(TickerTape, server).start()
+
+        _wait_for(lambda: len(server.accepted) >= 4)
+
+        gaps = [b - a for a, b in zip(server.accepted, server.accepted[1:])]
+        self.assertGreaterEqual(gaps[0], DEFAULT_RECONNECT_DELAY * 0.9)
+        self.assertGreater(gaps[1], gaps[0] * 1.5)
+        self.assertGreater(gaps[2], gaps[1] * 1.5)
+
+    def test_drop_oldest_keeps_the_latest_messages(self):
+        server = WebSocketStandIn([[_quote(i) for i in range(1, 51)]])
+        tape = self.stream(TickerTape, server, buffer_size=5, overflow=DROP_OLDEST)
+        tape.start()
+
+        _wait_for(lambda: tape.dropped == 45)
+        quotes = iter(tape)
+
+        self.assertEqual([next(quotes).bid for _ in range(5)], range(46, 51))
+
+    def test_block_applies_backpressure_without_dropping(self):
+        server = WebSocketStandIn([[_execution(i) for i in range(1, 51)]])
+        executions = self.stream(Executions, server, buffer_size=5, overflow=BLOCK)
+        executions.start()
+
+        time.sleep(DEFAULT_RECONNECT_DELAY * 2)
+        # the server hung up after sending, so a reader which had read everything would have
+        # reconnected by now; it is held up on the full buffer instead
+        self.assertEqual(executions.reconnects, 0)
+        self.assertEqual(executions.dropped, 0)
+
+        orders = iter(executions)
+        self.assertEqual([next(orders).id for _ in range(50)], range(1, 51))
+        self.assertEqual(executions.dropped, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
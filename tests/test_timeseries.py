@@ -0,0 +1,22 @@
+import unittest
+
+import numpy as np
+
+from stockfighter.timeseries import rolling_mean, rolling_volatility, rolling_vwap
+
+
+class RollingTest(unittest.TestCase):
+
+    def test_rolling_mean(self):
+        self.assertEqual(list(rolling_mean(np.array([1.0, 2.0, 3.0, 4.0]), 2)), [1.5, 2.5, 3.5])
+
+    def test_windows_below_one_are_rejected(self):
+        values = np.array([1.0, 2.0, 3.0])
+        for window in (0, -1):
+            self.assertRaises(ValueError, rolling_mean, values, window)
+            self.assertRaises(ValueError, rolling_vwap, values, values, window)
+            self.assertRaises(ValueError, rolling_volatility, values, window)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from collections import namedtuple
+
+from stockfighter.tracker import OrderTracker
+
+_Order = namedtuple('_Order', ['venue', 'symbol', 'id', 'open', 'fills'])
+_Orders = namedtuple('_Orders', ['orders'])
+
+
+class _Client(object):
+    '''
+    Answers :py:func:`api.all_orders` from a dict of orders per ``(venue, symbol)``.
+    '''
+
+    def __init__(self):
+        self.books = {}
+
+    def all_orders(self, venue, stock):
+        return _Orders(self.books.get((venue, stock), []))
+
+
+class OrderTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.client = _Client()
+        self.tracker = OrderTracker(client=self.client)
+        self.fills = []
+        self.tracker.on_fill(lambda order, fills: self.fills.append((order.venue, fills)))
+
+    def test_same_order_id_on_two_venues_is_tracked_separately(self):
+        self.tracker.track(_Order('ONEEX', 'FOO', 1, True, []))
+        self.tracker.track(_Order('TWOEX', 'FOO', 1, True, []))
+
+        self.assertEqual(len(self.tracker), 2)
+        self.assertIn(('ONEEX', 1), self.tracker)
+        self.assertIn(('TWOEX', 1), self.tracker)
+
+        self.client.books[('TWOEX', 'FOO')] = [_Order('TWOEX', 'FOO', 1, False, ['fill'])]
+        self.client.books[('ONEEX', 'FOO')] = [_Order('ONEEX', 'FOO', 1, True, [])]
+        self.assertTrue(self.tracker.refresh())
+
+        self.assertEqual(self.fills, [('TWOEX', ['fill'])])
+        self.assertIn(('ONEEX', 1), self.tracker)
+        self.assertNotIn(('TWOEX', 1), self.tracker)
+
+    def test_untrack_takes_the_venue(self):
+        self.tracker.track(_Order('ONEEX', 'FOO', 1, True, []))
+        self.tracker.track(_Order('TWOEX', 'FOO', 1, True, []))
+
+        self.tracker.untrack('ONEEX', 1)
+
+        self.assertEqual(list(self.tracker.orders), [('TWOEX', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
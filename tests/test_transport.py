@@ -0,0 +1,42 @@
+import threading
+import unittest
+
+from stockfighter.transport import Transport
+
+
+class _CountingTransport(Transport):
+
+    def __init__(self, *args, **kwargs):
+        Transport.__init__(self, *args, **kwargs)
+        self.opened = 0
+
+    def _open_session(self):
+        self.opened += 1
+        return Transport._open_session(self)
+
+
+class SessionTest(unittest.TestCase):
+
+    def test_concurrent_first_use_opens_one_session_per_venue(self):
+        transport = _CountingTransport(api_key='test')
+        start = threading.Event()
+        sessions = []
+
+        def use():
+            start.wait()
+            sessions.append(transport.session('TESTEX'))
+
+        threads = [threading.Thread(target=use) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        transport.close()
+
+        self.assertEqual(transport.opened, 1)
+        self.assertEqual(len(set(map(id, sessions))), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()